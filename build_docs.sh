@@ -19,46 +19,11 @@ pip install sphinx sphinx-rtd-theme myst-parser
 # Create docs structure if not exists
 mkdir -p docs/source/{_static,_templates,getting-started}
 
-# Configure Sphinx if not already configured
+# Sphinx configuration lives in the tracked docs/source/conf.py; never
+# generate a second, divergent copy here
 if [ ! -f "docs/source/conf.py" ]; then
-    # Create conf.py directly
-    cat > docs/source/conf.py << 'EOF'
-import os
-import sys
-sys.path.insert(0, os.path.abspath('../..'))
-
-project = 'ia-sdk'
-copyright = '2025, Documentation Team'
-author = 'Documentation Team'
-version = '0.4.22'
-release = '0.4.22'
-
-extensions = [
-    'sphinx.ext.autodoc',
-    'sphinx.ext.viewcode',
-    'sphinx.ext.napoleon',
-    'sphinx.ext.intersphinx',
-    'myst_parser'
-]
-
-templates_path = ['_templates']
-exclude_patterns = []
-
-html_theme = 'sphinx_rtd_theme'
-html_static_path = ['_static']
-
-# MyST Markdown settings
-myst_enable_extensions = [
-    "colon_fence",
-    "deflist"
-]
-
-# Intersphinx mapping
-intersphinx_mapping = {
-    'python': ('https://docs.python.org/3', None),
-    'requests': ('https://requests.readthedocs.io/en/latest/', None),
-}
-EOF
+    echo "docs/source/conf.py is missing; restore it from version control" >&2
+    exit 1
 fi
 
 # Create Makefile if it doesn't exist
@@ -6,21 +6,30 @@ Maps out the entire codebase structure, dependencies, and functionality
 import os
 import ast
 import sys
+import heapq
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
 import importlib
 import inspect
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+# Bump whenever the analysis logic changes so stale cache entries are ignored
+CACHE_VERSION = 4
+CACHE_FILE = ".codebase_analysis_cache.pkl"
+
+@dataclass(slots=True)
 class ModuleAnalysis:
-    def __init__(self, name: str, path: str):
-        self.name = name
-        self.path = path
-        self.classes: List[str] = []
-        self.functions: List[str] = []
-        self.dependencies: Set[str] = set()
-        self.doc_status = "Unknown"
-        self.test_status = "Unknown"
-        self.source_code = ""
+    name: str
+    path: str
+    classes: List[str] = field(default_factory=list)
+    functions: List[str] = field(default_factory=list)
+    dependencies: Set[str] = field(default_factory=set)
+    doc_percentage: Optional[float] = None
+    doc_status: str = "Unknown"
+    test_status: str = "Unknown"
 
     def to_dict(self) -> Dict:
         return {
@@ -29,51 +38,74 @@ class ModuleAnalysis:
             "classes": self.classes,
             "functions": self.functions,
             "dependencies": list(self.dependencies),
+            "doc_percentage": self.doc_percentage,
             "doc_status": self.doc_status,
             "test_status": self.test_status
         }
 
+# Nodes that can hold statements; imports and definitions never live elsewhere
+_STATEMENT_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+class _DefinitionVisitor(ast.NodeVisitor):
+    """Collect imports, classes and functions in a single traversal"""
+    def __init__(self, analysis: ModuleAnalysis):
+        self.analysis = analysis
+
+    def generic_visit(self, node: ast.AST):
+        # Only descend into statements, skipping every expression subtree
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, _STATEMENT_NODES):
+                self.visit(child)
+
+    def visit_Import(self, node: ast.Import):
+        for name in node.names:
+            self.analysis.dependencies.add(sys.intern(name.name))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self.analysis.dependencies.add(sys.intern(node.module))
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.analysis.classes.append(sys.intern(node.name))
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self.analysis.functions.append(sys.intern(node.name))
+        self.generic_visit(node)
+
+def _parse(source: bytes, file_path: str) -> ast.Module:
+    """Equivalent of ast.parse(source, file_path) without the wrapper frame"""
+    return compile(source, file_path, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+
+def _has_docstring(node: ast.AST) -> bool:
+    """Cheap equivalent of bool(ast.get_docstring(node)) without cleaning the text"""
+    body = node.body
+    if not body or not isinstance(body[0], ast.Expr):
+        return False
+    value = body[0].value
+    return isinstance(value, ast.Constant) and isinstance(value.value, str) and bool(value.value.strip())
+
 def analyze_file(file_path: str) -> ModuleAnalysis:
     """Analyze a single Python file"""
-    with open(file_path, 'r') as f:
-        content = f.read()
+    content = Path(file_path).read_bytes()
     
     module_name = os.path.splitext(os.path.basename(file_path))[0]
     analysis = ModuleAnalysis(module_name, file_path)
-    analysis.source_code = content
     
     try:
-        tree = ast.parse(content)
+        tree = _parse(content, file_path)
         
-        # Analyze imports
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    analysis.dependencies.add(name.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    analysis.dependencies.add(node.module)
-            
-            # Find classes and functions
-            if isinstance(node, ast.ClassDef):
-                analysis.classes.append(node.name)
-            elif isinstance(node, ast.FunctionDef):
-                analysis.functions.append(node.name)
-        
-        # Check documentation status
-        module_doc = ast.get_docstring(tree)
-        class_docs = [ast.get_docstring(node) for node in tree.body if isinstance(node, ast.ClassDef)]
-        func_docs = [ast.get_docstring(node) for node in tree.body if isinstance(node, ast.FunctionDef)]
+        # Collect definitions and imports while counting top-level docstrings
+        visitor = _DefinitionVisitor(analysis)
+        documented_items = 1 if _has_docstring(tree) else 0
+        for node in tree.body:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef)) and _has_docstring(node):
+                documented_items += 1
+            visitor.visit(node)
         
         total_items = len(analysis.classes) + len(analysis.functions) + 1  # +1 for module
-        documented_items = (
-            (1 if module_doc else 0) +
-            sum(1 for doc in class_docs if doc) +
-            sum(1 for doc in func_docs if doc)
-        )
-        
-        doc_percentage = (documented_items / total_items) * 100 if total_items > 0 else 0
-        analysis.doc_status = f"{doc_percentage:.1f}% documented"
+        analysis.doc_percentage = (documented_items / total_items) * 100 if total_items > 0 else 0
+        analysis.doc_status = f"{analysis.doc_percentage:.1f}% documented"
         
     except Exception as e:
         print(f"Error analyzing {file_path}: {str(e)}")
@@ -81,66 +113,159 @@ def analyze_file(file_path: str) -> ModuleAnalysis:
     
     return analysis
 
-def analyze_codebase(src_dir: str = "src/ia/gaius") -> Dict[str, ModuleAnalysis]:
-    """Analyze the entire codebase"""
+def _iter_py_files(root: str) -> Iterator[os.DirEntry]:
+    """Recursively yield directory entries for Python files under root"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            # is_dir/is_file reuse the d_type returned by the directory read,
+            # so no per-entry stat() is issued here
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_py_files(entry.path)
+            elif entry.name.endswith('.py') and entry.is_file(follow_symlinks=False):
+                yield entry
+
+def _load_cache(cache_path: str) -> Dict[Tuple[str, int, int], ModuleAnalysis]:
+    """Load previously computed analyses, discarding caches from other versions"""
+    try:
+        with open(cache_path, 'rb') as f:
+            version, cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+        return {}
+    return cache if version == CACHE_VERSION else {}
+
+def _save_cache(cache_path: str, cache: Dict[Tuple[str, int, int], ModuleAnalysis]):
+    """Persist analyses keyed by (path, mtime_ns, size)"""
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, cache), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Could not write analysis cache {cache_path}: {str(e)}")
+
+def analyze_codebase(src_dir: str = "src/ia/gaius",
+                     cache_path: Optional[str] = CACHE_FILE,
+                     max_workers: Optional[int] = None) -> Dict[str, ModuleAnalysis]:
+    """Analyze the entire codebase
+
+    Files whose path, mtime and size match an entry in the on-disk cache are
+    not re-parsed. Pass cache_path=None to disable the cache. Remaining files
+    are parsed in a process pool of max_workers processes (defaults to the
+    number of CPUs); max_workers=1 parses them in-process.
+    """
+    cache = _load_cache(cache_path) if cache_path else {}
+    keys = []
+    for entry in _iter_py_files(src_dir):
+        st = entry.stat()
+        keys.append((entry.path, st.st_mtime_ns, st.st_size))
+    
+    misses = [key[0] for key in keys if key not in cache]
+    if len(misses) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = dict(zip(misses, executor.map(analyze_file, misses, chunksize=16)))
+    else:
+        parsed = {path: analyze_file(path) for path in misses}
+    
     analyses = {}
+    fresh_cache = {}
+    for key in keys:
+        analysis = cache.get(key) or parsed[key[0]]
+        fresh_cache[key] = analysis
+        analyses[analysis.name] = analysis
     
-    for root, _, files in os.walk(src_dir):
-        for file in files:
-            if file.endswith('.py'):
-                file_path = os.path.join(root, file)
-                analysis = analyze_file(file_path)
-                analyses[analysis.name] = analysis
+    if cache_path:
+        _save_cache(cache_path, fresh_cache)
     
     return analyses
 
+def _topological_order(graph: Dict[str, Set[str]]) -> Tuple[List[str], List[str]]:
+    """Order modules so each appears after the modules it depends on (Kahn's algorithm)
+
+    graph maps each module to the set of modules it depends on. Returns the
+    ordered modules and, separately, the modules left over because they sit
+    on or behind a dependency cycle. Ties are broken alphabetically.
+    """
+    in_degree = {module: 0 for module in graph}
+    dependents: Dict[str, List[str]] = {module: [] for module in graph}
+    for module, deps in graph.items():
+        for dep in deps:
+            if dep != module and dep in dependents:
+                dependents[dep].append(module)
+                in_degree[module] += 1
+    
+    ready = [module for module, degree in in_degree.items() if degree == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        module = heapq.heappop(ready)
+        order.append(module)
+        for dependent in dependents[module]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                heapq.heappush(ready, dependent)
+    
+    cyclic = sorted(module for module, degree in in_degree.items() if degree > 0)
+    return order, cyclic
+
 def print_analysis_report(analyses: Dict[str, ModuleAnalysis]):
     """Print a comprehensive analysis report"""
-    print("\n=== ia-sdk Codebase Analysis ===")
-    print(f"Analysis Date: {datetime.now()}")
-    print(f"Total Modules: {len(analyses)}")
+    # Collect every line and emit them with a single write at the end
+    out: List[str] = []
+    p = out.append
+    p("\n=== ia-sdk Codebase Analysis ===")
+    p(f"Analysis Date: {datetime.now()}")
+    p(f"Total Modules: {len(analyses)}")
     
     # Module Overview
-    print("\n=== Module Overview ===")
+    p("\n=== Module Overview ===")
     for name, analysis in sorted(analyses.items()):
-        print(f"\n{name}:")
-        print(f"  Path: {analysis.path}")
-        print(f"  Classes: {', '.join(analysis.classes) or 'None'}")
-        print(f"  Functions: {', '.join(analysis.functions) or 'None'}")
-        print(f"  Dependencies: {', '.join(sorted(analysis.dependencies)) or 'None'}")
-        print(f"  Documentation: {analysis.doc_status}")
+        p(f"\n{name}:")
+        p(f"  Path: {analysis.path}")
+        p(f"  Classes: {', '.join(analysis.classes) or 'None'}")
+        p(f"  Functions: {', '.join(analysis.functions) or 'None'}")
+        p(f"  Dependencies: {', '.join(sorted(analysis.dependencies)) or 'None'}")
+        p(f"  Documentation: {analysis.doc_status}")
     
     # Dependency Graph
-    print("\n=== Dependency Graph ===")
+    p("\n=== Dependency Graph ===")
     internal_deps = {}
+    prefixes = tuple(f"ia.gaius.{m}" for m in analyses.keys())
+    # Longest prefixes first so a dependency resolves to the most specific module
+    prefix_modules = sorted(((f"ia.gaius.{m}", m) for m in analyses.keys()), reverse=True)
+    module_graph = {}
     for name, analysis in analyses.items():
         internal_deps[name] = {
-            dep for dep in analysis.dependencies 
-            if any(dep.startswith(f"ia.gaius.{m}") for m in analyses.keys())
+            dep for dep in analysis.dependencies if dep.startswith(prefixes)
+        }
+        module_graph[name] = {
+            next(m for prefix, m in prefix_modules if dep.startswith(prefix))
+            for dep in internal_deps[name]
         }
     
-    for module, deps in sorted(internal_deps.items()):
+    order, cyclic = _topological_order(module_graph)
+    for module in order + cyclic:
+        deps = internal_deps[module]
         if deps:
-            print(f"{module} -> {', '.join(sorted(deps))}")
+            p(f"{module} -> {', '.join(sorted(deps))}")
+    if cyclic:
+        p(f"Dependency cycle involving: {', '.join(cyclic)}")
     
     # Documentation Status
-    print("\n=== Documentation Status ===")
+    p("\n=== Documentation Status ===")
     doc_percentages = [
-        float(analysis.doc_status.split('%')[0])
+        analysis.doc_percentage
         for analysis in analyses.values()
-        if '%' in analysis.doc_status
+        if analysis.doc_percentage is not None
     ]
     if doc_percentages:
         avg_doc = sum(doc_percentages) / len(doc_percentages)
-        print(f"Average documentation coverage: {avg_doc:.1f}%")
+        p(f"Average documentation coverage: {avg_doc:.1f}%")
     
     # Recommendations
-    print("\n=== Recommendations ===")
+    p("\n=== Recommendations ===")
     for name, analysis in sorted(analyses.items()):
-        if '%' in analysis.doc_status:
-            doc_percent = float(analysis.doc_status.split('%')[0])
-            if doc_percent < 50:
-                print(f"- {name}: Needs documentation improvement ({analysis.doc_status})")
+        if analysis.doc_percentage is not None and analysis.doc_percentage < 50:
+            p(f"- {name}: Needs documentation improvement ({analysis.doc_status})")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
 if __name__ == "__main__":
     print("Starting comprehensive codebase analysis...")
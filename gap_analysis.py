@@ -4,6 +4,9 @@ Gap Analysis for ia-sdk Verification
 This script attempts to test functionality we haven't verified yet.
 """
 import sys
+import argparse
+import functools
+import importlib.util
 from datetime import datetime
 import traceback
 
@@ -26,8 +29,19 @@ def analyze_feature(name, test_fn):
         traceback.print_exc()
         return TestResult(name, "failed", f"Error: {str(e)}")
 
+def missing_modules(*names):
+    """Return the names of modules that are not installed, without importing them"""
+    return [name for name in names if importlib.util.find_spec(name) is None]
+
+def untested_result(name, missing):
+    return TestResult(name, "untested", f"- Skipped, missing packages: {', '.join(missing)}")
+
+@functools.lru_cache(maxsize=None)
 def check_agent_connectivity():
     """Analyze agent connection capabilities"""
+    missing = missing_modules('requests')
+    if missing:
+        return untested_result("Agent Connectivity", missing)
     from ia.gaius.agent_client import AgentClient
     
     notes = [
@@ -39,8 +53,12 @@ def check_agent_connectivity():
     ]
     return TestResult("Agent Connectivity", "partial", "\n".join(notes))
 
+@functools.lru_cache(maxsize=None)
 def check_docker_integration():
     """Analyze Docker integration"""
+    missing = missing_modules('docker')
+    if missing:
+        return untested_result("Docker Integration", missing)
     import ia.gaius.manager as manager
     
     notes = [
@@ -52,8 +70,12 @@ def check_docker_integration():
     ]
     return TestResult("Docker Integration", "partial", "\n".join(notes))
 
+@functools.lru_cache(maxsize=None)
 def check_data_processing():
     """Analyze data processing capabilities"""
+    missing = missing_modules('networkx')
+    if missing:
+        return untested_result("Data Processing", missing)
     from ia.gaius.data_structures import conditional_add_edge
     
     notes = [
@@ -65,8 +87,12 @@ def check_data_processing():
     ]
     return TestResult("Data Processing", "partial", "\n".join(notes))
 
+@functools.lru_cache(maxsize=None)
 def check_experimental_features():
     """Analyze experimental features"""
+    missing = missing_modules('sklearn', 'deap')
+    if missing:
+        return untested_result("Experimental Features", missing)
     notes = [
         "- sklearn imports verified ✓",
         "- DEAP integration untested",
@@ -76,8 +102,12 @@ def check_experimental_features():
     ]
     return TestResult("Experimental Features", "partial", "\n".join(notes))
 
+@functools.lru_cache(maxsize=None)
 def check_storage():
     """Analyze storage and persistence"""
+    missing = missing_modules('pymongo')
+    if missing:
+        return untested_result("Storage & Persistence", missing)
     notes = [
         "- MongoDB client import verified ✓",
         "- Actual database operations untested",
@@ -87,21 +117,30 @@ def check_storage():
     ]
     return TestResult("Storage & Persistence", "partial", "\n".join(notes))
 
-def main():
+# Checks selectable with --only, in reporting order
+ANALYSES = {
+    'connectivity': ("Agent Connectivity", check_agent_connectivity),
+    'docker': ("Docker Integration", check_docker_integration),
+    'data': ("Data Processing", check_data_processing),
+    'experimental': ("Experimental Features", check_experimental_features),
+    'storage': ("Storage & Persistence", check_storage)
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Identify ia-sdk functionality that hasn't been fully verified.")
+    parser.add_argument('--only', nargs='+', choices=ANALYSES.keys(), metavar='CHECK',
+                        help=f"run only these checks ({', '.join(ANALYSES)})")
+    args = parser.parse_args(argv)
+    
     print("ia-sdk Gap Analysis")
     print(f"Date: {datetime.now()}")
     print("This analysis identifies functionality that hasn't been fully verified.")
     
-    analyses = [
-        ("Agent Connectivity", check_agent_connectivity),
-        ("Docker Integration", check_docker_integration),
-        ("Data Processing", check_data_processing),
-        ("Experimental Features", check_experimental_features),
-        ("Storage & Persistence", check_storage)
-    ]
+    selected = [key for key in ANALYSES if not args.only or key in args.only]
     
     results = []
-    for name, analysis in analyses:
+    for key in selected:
+        name, analysis = ANALYSES[key]
         results.append(analyze_feature(name, analysis))
     
     print("\n=== Summary of Unverified Features ===")
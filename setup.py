@@ -15,6 +15,7 @@ setup(
     extras_require={
         "dev": [
             "pytest>=7.0.0",
+            "pytest-xdist>=3.0.0",
             "sphinx>=4.5.0",
             "sphinx-rtd-theme>=1.0.0",
         ],
@@ -152,14 +152,17 @@ class AgentClient:
         return interface_dict
 
     def set_timeout(self, timeout: float):
-        """Redefine timeout for AgentClient API Calls. Requires re-instantiating requests.Session object
+        """Redefine timeout for AgentClient API Calls. The existing requests.Session
+        is kept, so its pooled keep-alive connections are reused
 
         Args:
             timeout (float): The requested timeout (in seconds)
         """
-        self.session = requests.Session()
-        self.session.request = functools.partial(
-            self.session.request, timeout=timeout)
+        request = self.session.request
+        if isinstance(request, functools.partial):
+            request = request.func
+        self.session.request = functools.partial(request, timeout=timeout)
+        self._timeout = timeout
         return
 
     def receive_unique_ids(self, should_set: bool = True) -> bool:
@@ -32,6 +32,8 @@ def generate_gene_data(config):
     for gene, params in config.items():
         if params["step"] == 0:
             value = round(random.uniform(params["start"], params["stop"]), 2)
+            # rounding can step just outside the range; clip back into it
+            value = min(max(value, params["start"]), params["stop"])
         else:
             values = range(params["start"], params["stop"], params["step"])
             # print(gene, list(values))
@@ -1,7 +1,15 @@
 """Test configuration for pytest."""
 import pytest
 import sys
-import os
+from pathlib import Path
 
 # Add src directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+def pytest_configure(config):
+    """Configure pytest with custom markers."""
+    # Provided by pytest-xdist; `--dist loadgroup` runs every test sharing a
+    # group name on the same worker, so module- and session-scoped fixtures
+    # are built once per module rather than once per worker
+    config.addinivalue_line("markers", "xdist_group(name): run tests with the same group name on one xdist worker")
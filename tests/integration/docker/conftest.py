@@ -17,9 +17,9 @@ def docker_client() -> docker.DockerClient:
     yield client
     client.close()
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def docker_container(docker_client: docker.DockerClient) -> Generator[docker.models.containers.Container, None, None]:
-    """Create a Docker container for testing and ensure it's cleaned up after the test."""
+    """Create a Docker container shared by the whole test session and clean it up afterwards."""
     # Generate a unique container name to avoid conflicts
     container_name = f"test-gaius-agent-{uuid.uuid4().hex[:8]}"
     
@@ -67,7 +67,7 @@ def docker_container(docker_client: docker.DockerClient) -> Generator[docker.mod
         # Container already removed
         pass
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def agent_config(docker_container) -> Dict:
     """Create an agent client configuration for connecting to the Docker container."""
     return {
@@ -77,3 +77,21 @@ def agent_config(docker_container) -> Dict:
         "secure": False
     }
 
+@pytest.fixture(scope="session")
+def connected_client(agent_config):
+    """Provide an AgentClient connected to the session container."""
+    # Imported here because the test module, not this conftest, puts src on sys.path
+    from ia.gaius.agent_client import AgentClient
+    client = AgentClient(agent_config)
+    client.connect()
+    return client
+
+@pytest.fixture(autouse=True)
+def reset_connected_client(request):
+    """Restore the shared client to a clean state after each test that used it."""
+    yield
+    if "connected_client" in request.fixturenames:
+        client = request.getfixturevalue("connected_client")
+        client.clear_wm()
+        client.set_ingress_nodes([])
+        client.set_query_nodes([])
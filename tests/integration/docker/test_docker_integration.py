@@ -1,5 +1,6 @@
 """Integration tests for Docker functionality of the ia-sdk."""
 import pytest
+import random
 import requests
 import time
 import sys
@@ -12,6 +13,33 @@ sys.path.insert(0, src_path)
 
 from ia.gaius.agent_client import AgentClient, AgentConnectionError
 
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def with_retry(fn, max_retries=6, base_delay_ms=100, max_delay_ms=5000, jitter_ms=50,
+               should_retry=None):
+    """Call fn until it succeeds, backing off exponentially with jitter between attempts.
+
+    An attempt fails when fn raises one of RETRYABLE_ERRORS or when
+    should_retry(result) is true. The delay starts at base_delay_ms, doubles
+    per attempt up to max_delay_ms, and is shifted by up to +/- jitter_ms so
+    parallel workers do not poll in lockstep. After the last attempt the
+    final result is returned, or the final exception re-raised.
+    """
+    for attempt in range(max_retries):
+        last_attempt = attempt == max_retries - 1
+        try:
+            result = fn()
+        except RETRYABLE_ERRORS:
+            if last_attempt:
+                raise
+        else:
+            if last_attempt or should_retry is None or not should_retry(result):
+                return result
+        delay_ms = min(base_delay_ms * 2 ** attempt, max_delay_ms)
+        time.sleep(max(0.0, delay_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+
 def test_docker_container_running(docker_container):
     """Test that the Docker container is running."""
     assert docker_container.status == "running"
@@ -24,19 +52,17 @@ def test_container_health_check(docker_container):
     """Test that the container is healthy and accepting HTTP requests."""
     # Simple HTTP request to check if the container is responding
     base_url = f"http://localhost:{docker_container.host_port}"
-    max_retries = 5
-    retry_delay = 2
+    # 7 attempts back off 0.1s..3.2s, roughly 6s of waiting in the worst case
+    max_retries = 7
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(f"{base_url}/health", timeout=5)
-            if response.status_code == 200:
-                break
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
-            pytest.fail(f"Failed to connect to container after {max_retries} attempts")
+    try:
+        response = with_retry(
+            lambda: requests.get(f"{base_url}/health", timeout=5),
+            max_retries=max_retries,
+            should_retry=lambda r: r.status_code != 200
+        )
+    except RETRYABLE_ERRORS:
+        pytest.fail(f"Failed to connect to container after {max_retries} attempts")
     
     assert response.status_code == 200, f"Health check failed with status code: {response.status_code}"
     health_data = response.json()
@@ -58,10 +84,9 @@ def test_agent_client_connection(agent_config):
     assert client.gaius_agent is not None, "Agent info is None after connection"
     assert len(client.all_nodes) > 0, "No nodes found in agent"
 
-def test_agent_client_query_operations(agent_config):
+def test_agent_client_query_operations(connected_client):
     """Test basic query operations with the agent in the Docker container."""
-    client = AgentClient(agent_config)
-    client.connect()
+    client = connected_client
     
     # Set up nodes
     primitive_nodes = [node["name"] for node in client.all_nodes if "name" in node]
@@ -89,10 +114,9 @@ def test_agent_client_query_operations(agent_config):
     clear_result = client.clear_wm(nodes=[test_node])
     assert clear_result is not None, "Failed to clear working memory"
 
-def test_agent_client_cleanup(agent_config):
+def test_agent_client_cleanup(connected_client):
     """Test that the AgentClient properly cleans up resources."""
-    client = AgentClient(agent_config)
-    client.connect()
+    client = connected_client
     
     # Connect and disconnect multiple times to check for resource leaks
     for _ in range(3):
@@ -1,43 +1,102 @@
 """Fixtures for performance testing."""
+import gc
 import os
+import sys
 import time
 import json
 import psutil
 import pytest
 import logging
+import logging.handlers
+import queue
 import tempfile
 import platform
-import statistics
 import numpy as np
 import contextlib
 import csv
+import functools
+import itertools
+import statistics
+import threading
+import tracemalloc
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Callable
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
 from ia.gaius.agent_client import AgentClient
 from ia.gaius.manager import AgentManager
-from ia.gaius.utils import create_gdf
 
 # Configuration from environment variables
 ITERATIONS = int(os.getenv('PERF_TEST_ITERATIONS', '5'))
+# Untimed runs before each benchmark, absorbing one-time costs such as the
+# first connection to the agent
+WARMUP_ITERATIONS = int(os.getenv('PERF_TEST_WARMUP', '1'))
 SIZE_MULTIPLIER = float(os.getenv('PERF_TEST_SIZE_MULTIPLIER', '1.0'))
 SAVE_RESULTS = os.getenv('PERF_TEST_SAVE_RESULTS', 'true').lower() == 'true'
 RESULTS_DIR = os.getenv('PERF_TEST_RESULTS_DIR', './results')
+MEMPROFILE = os.getenv('PERF_TEST_MEMPROFILE', 'false').lower() == 'true'
+# CPU to pin the test thread to; pinning is disabled when unset
+PIN_CPU = os.getenv('PERF_TEST_CPU')
+# Test level: 'standard' skips tests marked slow, 'full' runs everything
+TEST_LEVEL = os.getenv('PERF_TEST_LEVEL', 'standard')
+
+# Directory holding the performance tests; the collection hook only touches these
+PERF_TESTS_DIR = Path(__file__).resolve().parent
+# Parametrized tests whose value for one of these parameters reaches the
+# threshold are marked slow at collection time
+SLOW_PARAM_THRESHOLDS = {
+    'batch_size': 200,
+    'sequence_count': 30,
+}
+
+# Identifies this test session in result file names and rows
+SESSION_ID = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+# Sequence numbers for agent IDs; unique within this process, and the pid in
+# the ID keeps concurrent or consecutive runs apart
+_agent_counter = itertools.count()
+
+# Seconds between RSS samples taken while measure_memory runs a function
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+# CPUs this process may run on, captured before any pinning
+AVAILABLE_CPUS = (sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                  else list(range(os.cpu_count() or 1)))
+
+# Number of allocation sites reported by track_allocations
+TOP_ALLOCATIONS = 10
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
 
 # Ensure results directory exists if saving is enabled
 if SAVE_RESULTS:
     Path(RESULTS_DIR).mkdir(parents=True, exist_ok=True)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(RESULTS_DIR, 'performance_tests.log') if SAVE_RESULTS else 'performance_tests.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging. Records are queued by the test thread and formatted and
+# written by a background listener, keeping file I/O out of measured code.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler(os.path.join(RESULTS_DIR, 'performance_tests.log') if SAVE_RESULTS else 'performance_tests.log'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+# Attach to the root logger directly; basicConfig is a no-op once pytest has
+# installed its own capture handlers
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
 logger = logging.getLogger('ia_performance_tests')
 
 
@@ -53,70 +112,234 @@ def perf_agent_manager():
     manager.kill_all_agents()
 
 
+# Gene settings applied to every performance test agent
+PERF_AGENT_GENES = {
+    "max_predictions": 20,  # Balanced value for testing
+    "recall_threshold": 0.1  # Standard value
+}
+
+
+class AgentPool:
+    """Pool of started performance test agents, reused across tests.
+    
+    Released agents are marked dirty and only reset (memory cleared,
+    predicting re-enabled, genes restored) when they are next acquired, so
+    the releasing test never waits on the reset. New agents are started only
+    when no released agent is available.
+    """
+    
+    def __init__(self, manager):
+        self.manager = manager
+        self._free = deque()
+        self._names = []
+    
+    def _start(self):
+        agent_name = f"perf-agent-{os.getpid()}-{next(_agent_counter)}"
+        
+        logger.info(f"Starting performance test agent {agent_name}")
+        agent_obj = self.manager.start_agent(
+            genome_name="simple.genome",
+            agent_id=agent_name,
+            agent_name=agent_name
+        )
+        self._names.append(agent_name)
+        
+        # Get the agent client and connect
+        agent = agent_obj.get_agent_client()
+        agent.connect()
+        agent.set_ingress_nodes(["P1"])
+        agent.set_query_nodes(["P1"])
+        
+        # Set optimal settings for performance testing
+        agent.change_genes(PERF_AGENT_GENES)
+        return agent
+    
+    @staticmethod
+    def _reset(agent):
+        agent.clear_all_memory()
+        agent.start_predicting()
+        agent.set_ingress_nodes(["P1"])
+        agent.set_query_nodes(["P1"])
+        agent.change_genes(PERF_AGENT_GENES)
+    
+    @contextlib.contextmanager
+    def acquire_clean(self):
+        """Context manager yielding a clean agent and releasing it on exit."""
+        if self._free:
+            agent = self._free.popleft()
+            self._reset(agent)
+        else:
+            agent = self._start()
+        try:
+            yield agent
+        finally:
+            self._free.append(agent)
+    
+    def close(self):
+        """Delete every agent started by the pool."""
+        for agent_name in self._names:
+            logger.info(f"Cleaning up performance test agent {agent_name}")
+            self.manager.delete_agent(agent_name)
+        self._free.clear()
+        self._names.clear()
+
+
+@pytest.fixture(scope="session")
+def perf_agent_pool(perf_agent_manager):
+    """Provides the session-wide pool of performance test agents."""
+    pool = AgentPool(perf_agent_manager)
+    yield pool
+    pool.close()
+
+
 @pytest.fixture(scope="function")
-def perf_agent(perf_agent_manager):
+def perf_agent(perf_agent_pool):
     """Provides a clean agent for performance testing."""
-    agent_id = f"perf-agent-{os.urandom(4).hex()}"
-    agent_name = agent_id
+    with perf_agent_pool.acquire_clean() as agent:
+        yield agent
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pin_cpu():
+    """Pin the test thread to PERF_TEST_CPU for each module's tests.
     
-    logger.info(f"Starting performance test agent {agent_name}")
-    agent_obj = perf_agent_manager.start_agent(
-        genome_name="simple.genome",
-        agent_id=agent_id,
-        agent_name=agent_name
-    )
+    Keeps the measuring thread from migrating between cores and, where the
+    process is permitted to, runs it under SCHED_FIFO so normal-priority
+    tasks cannot preempt it. Threads started meanwhile inherit both. Does
+    nothing unless PERF_TEST_CPU is set and the platform supports affinity.
+    """
+    if PIN_CPU is None or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
     
-    # Get the agent client and connect
-    agent = agent_obj.get_agent_client()
-    agent.connect()
-    agent.set_ingress_nodes(["P1"])
-    agent.set_query_nodes(["P1"])
+    previous_affinity = os.sched_getaffinity(0)
+    previous_policy = os.sched_getscheduler(0)
+    previous_param = os.sched_getparam(0)
+    os.sched_setaffinity(0, {int(PIN_CPU)})
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(os.sched_get_priority_min(os.SCHED_FIFO)))
+    except PermissionError:
+        logger.info("SCHED_FIFO not permitted; running with the default scheduler")
     
-    # Set optimal settings for performance testing
-    agent.change_genes({
-        "max_predictions": 20,  # Balanced value for testing
-        "recall_threshold": 0.1  # Standard value
-    })
+    try:
+        yield
+    finally:
+        os.sched_setscheduler(0, previous_policy, previous_param)
+        os.sched_setaffinity(0, previous_affinity)
+
+
+@pytest.fixture
+def pin_worker():
+    """Fixture pinning the calling thread to the index-th available CPU.
     
-    yield agent
+    Lets concurrent workers, which would otherwise inherit the test thread's
+    single pinned CPU, each run on a core of their own. Does nothing unless
+    CPU pinning is enabled.
+    """
+    def _pin_worker(index):
+        if PIN_CPU is not None and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {AVAILABLE_CPUS[index % len(AVAILABLE_CPUS)]})
     
-    # Clean up
-    logger.info(f"Cleaning up performance test agent {agent_name}")
-    perf_agent_manager.delete_agent(agent_name)
+    return _pin_worker
 
 
 @pytest.fixture(scope="session")
-def system_info():
-    """Provides system information for contextualizing performance results."""
-    info = {
+def background_executor():
+    """Provides a session-wide thread pool for running background load in concurrency tests."""
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="perf-background") as executor:
+        yield executor
+
+
+@functools.lru_cache(maxsize=None)
+def _system_info():
+    """Collect system information once; platform queries can shell out."""
+    return {
         "platform": platform.platform(),
         "processor": platform.processor(),
         "python_version": platform.python_version(),
         "cpu_count": os.cpu_count(),
         "memory_total": psutil.virtual_memory().total,
+        "session_id": SESSION_ID,
         "timestamp": datetime.now().isoformat()
     }
-    return info
+
+
+@pytest.fixture(scope="session")
+def system_info():
+    """Provides system information for contextualizing performance results."""
+    return _system_info()
+
+
+def _sorted_percentiles(ordered, percents):
+    """Compute several percentiles of an already sorted list.
+    
+    Uses linear interpolation between closest ranks, matching the default
+    method of numpy.percentile, without building a NumPy array.
+    """
+    last = len(ordered) - 1
+    values = []
+    for percent in percents:
+        position = percent / 100 * last
+        lower = int(position)
+        upper = min(lower + 1, last)
+        values.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return values
+
+
+def _stats_from_times(times):
+    """Summarize a list of timings from a single sort.
+    
+    Returns mean, median, sample standard deviation, min, max, p95 and p99.
+    """
+    ordered = sorted(times)
+    n = len(ordered)
+    mean = statistics.fmean(ordered)
+    middle = n // 2
+    p95, p99 = _sorted_percentiles(ordered, (95, 99))
+    return {
+        "mean": mean,
+        "median": ordered[middle] if n % 2 else (ordered[middle - 1] + ordered[middle]) / 2,
+        "stdev": (sum((t - mean) ** 2 for t in ordered) / (n - 1)) ** 0.5 if n > 1 else 0,
+        "min": ordered[0],
+        "max": ordered[-1],
+        "p95": p95,
+        "p99": p99
+    }
+
+
+@pytest.fixture
+def stats_from_times():
+    """Fixture summarizing a list of timings; see _stats_from_times."""
+    return _stats_from_times
 
 
 @contextlib.contextmanager
 def measure_time():
-    """Context manager to measure execution time."""
-    start_time = time.time()
-    yield
-    end_time = time.time()
-    elapsed = end_time - start_time
-    return elapsed
+    """Context manager to measure execution time.
+    
+    Yields a one-element list that holds the elapsed time in nanoseconds
+    once the block exits.
+    """
+    elapsed = [0]
+    start_ns = time.perf_counter_ns()
+    yield elapsed
+    elapsed[0] = time.perf_counter_ns() - start_ns
+
+
+@pytest.fixture
+def measure_time_cm():
+    """Fixture providing the measure_time context manager."""
+    return measure_time
 
 
 @pytest.fixture
 def time_execution():
     """Fixture to time execution of code blocks."""
     def _time_execution(func, *args, **kwargs):
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        return result, end_time - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        return result, elapsed_ns / 1e9
     
     return _time_execution
 
@@ -124,7 +347,8 @@ def time_execution():
 @pytest.fixture
 def benchmark_operation():
     """Fixture to benchmark an operation over multiple iterations."""
-    def _benchmark(operation_func, iterations=ITERATIONS, setup_func=None, cleanup_func=None, **kwargs):
+    def _benchmark(operation_func, iterations=ITERATIONS, setup_func=None, cleanup_func=None,
+                   keep_results=False, warmup=WARMUP_ITERATIONS, **kwargs):
         """
         Benchmark an operation over multiple iterations.
         
@@ -133,41 +357,47 @@ def benchmark_operation():
             iterations: Number of iterations
             setup_func: Function to run before each iteration
             cleanup_func: Function to run after each iteration
+            keep_results: Whether to collect the value returned by each
+                iteration; results are dropped by default to bound memory
+            warmup: Number of untimed runs, with setup and cleanup, before
+                the measured iterations; they are not part of the statistics
             **kwargs: Arguments to pass to operation_func
             
         Returns:
-            Dict containing timing statistics
+            Tuple of a dict containing timing statistics and the list of
+            per-iteration results, or None unless keep_results is set
         """
-        times = []
-        results = []
+        for i in range(warmup):
+            if setup_func:
+                setup_func(iteration=i)
+            operation_func(**kwargs)
+            if cleanup_func:
+                cleanup_func(iteration=i)
+        
+        times_ns = []
+        results = [] if keep_results else None
         
         for i in range(iterations):
             if setup_func:
                 setup_func(iteration=i)
                 
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             result = operation_func(**kwargs)
-            end_time = time.time()
-            
-            elapsed = end_time - start_time
-            times.append(elapsed)
-            results.append(result)
+            times_ns.append(time.perf_counter_ns() - start_ns)
+            if keep_results:
+                results.append(result)
             
             if cleanup_func:
                 cleanup_func(iteration=i)
         
+        # Timings stay integer nanoseconds until reported in seconds
+        times = [elapsed_ns / 1e9 for elapsed_ns in times_ns]
+        
         # Calculate statistics
-        stats = {
-            "mean": statistics.mean(times),
-            "median": statistics.median(times),
-            "stdev": statistics.stdev(times) if len(times) > 1 else 0,
-            "min": min(times),
-            "max": max(times),
-            "p95": np.percentile(times, 95),
-            "p99": np.percentile(times, 99),
-            "iterations": iterations,
-            "total_time": sum(times)
-        }
+        stats = _stats_from_times(times)
+        stats["iterations"] = iterations
+        stats["warmup_iterations"] = warmup
+        stats["total_time"] = stats["mean"] * iterations
         
         logger.info(f"Benchmark results: {stats}")
         return stats, results
@@ -175,12 +405,59 @@ def benchmark_operation():
     return _benchmark
 
 
+# Columns of the per-session results file; each saved result becomes one
+# row per metric, grouped by record number. The session_id is the session's
+# start timestamp; system information lives in the session's system_info JSON
+# file and is joined on it.
+RESULT_COLUMNS = ["session_id", "record", "test_name", "metric", "value"]
+
+
+@pytest.fixture(scope="session")
+def results_writer():
+    """Provides a callable collecting benchmark records for a single CSV file per session.
+    
+    Records are kept in memory and written in one pass when the session
+    ends, so no results file I/O happens while tests run.
+    """
+    if not SAVE_RESULTS:
+        yield None
+        return
+    
+    filename = os.path.join(RESULTS_DIR, f"results_{SESSION_ID}.csv")
+    rows = []
+    records = itertools.count()
+    
+    def _append(batch):
+        """Queue (test_name, values) records, one row per metric."""
+        for test_name, values in batch:
+            record = next(records)
+            rows.extend((SESSION_ID, record, test_name, metric, value)
+                        for metric, value in values.items())
+        return filename
+    
+    yield _append
+    
+    if rows:
+        with open(filename, 'a', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            if csvfile.tell() == 0:
+                writer.writerow(RESULT_COLUMNS)
+            writer.writerows(rows)
+        logger.info(f"Wrote {len(rows)} result rows to {filename}")
+
+
 @pytest.fixture
-def save_benchmark_results(system_info):
-    """Fixture to save benchmark results to CSV."""
+def save_benchmark_results(results_writer):
+    """Fixture to save benchmark results to the session results CSV.
+    
+    Results are buffered in memory and handed to the session's results
+    writer when the test finishes.
+    """
+    pending = []
+    
     def _save_results(test_name, results, additional_params=None):
         """
-        Save benchmark results to CSV.
+        Queue benchmark results for the session results CSV.
         
         Args:
             test_name: Name of the test
@@ -190,35 +467,28 @@ def save_benchmark_results(system_info):
         if not SAVE_RESULTS:
             return
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(RESULTS_DIR, f"{test_name}_{timestamp}.csv")
-        
-        # Combine results with system info
-        full_results = {
-            "test_name": test_name,
-            "timestamp": timestamp,
-            **results,
-            **system_info
-        }
-        
+        values = dict(results)
         if additional_params:
-            full_results.update(additional_params)
-        
-        # Save to CSV
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=full_results.keys())
-            writer.writeheader()
-            writer.writerow(full_results)
+            values.update(additional_params)
         
-        logger.info(f"Saved benchmark results to {filename}")
-        return filename
+        pending.append((test_name, values))
+    
+    yield _save_results
     
-    return _save_results
+    if pending:
+        filename = results_writer(pending)
+        logger.info(f"Queued {len(pending)} benchmark results for {filename}")
 
 
 @pytest.fixture
 def generate_test_data():
-    """Fixture to generate test data of varying sizes."""
+    """Fixture to generate test data of varying sizes.
+    
+    Generated lists are memoized for the duration of a test, so repeated
+    requests for the same data return the same list; treat it as read-only.
+    """
+    cache = {}
+    
     def _generate_data(data_type="strings", size=10, complexity=1):
         """
         Generate test data of the specified type and size.
@@ -231,26 +501,43 @@ def generate_test_data():
         Returns:
             List of GDF formatted data
         """
+        key = (data_type, size, complexity)
+        if key not in cache:
+            cache[key] = _build_data(data_type, size, complexity)
+        return cache[key]
+    
+    def _build_data(data_type, size, complexity):
         # Apply size multiplier
         size = int(size * SIZE_MULTIPLIER * complexity)
         
+        n_strings = range(int(complexity))
+        
+        # GDFs are built as literals with the key layout of create_gdf. The
+        # inputs are well formed by construction, so its per-item validation
+        # is skipped; every item still gets its own containers.
         if data_type == "strings":
             # Generate string-only GDFs
-            return [create_gdf(strings=[f"item_{i}_{j}" for j in range(int(complexity))]) 
+            return [{"vectors": [], "strings": [f"item_{i}_{j}" for j in n_strings],
+                     "emotives": {}, "metadata": {}}
                     for i in range(size)]
         
         elif data_type == "vectors":
-            # Generate vector-only GDFs
-            return [create_gdf(vectors=[[float(j)/10 for j in range(int(10*complexity))]]) 
-                    for i in range(size)]
+            # Generate vector-only GDFs; every item carries a copy of the same vector
+            vector = (np.arange(int(10*complexity), dtype=np.float64) / 10).tolist()
+            return [{"vectors": [list(vector)], "strings": [], "emotives": {}, "metadata": {}}
+                    for _ in range(size)]
         
         elif data_type == "mixed":
             # Generate mixed GDFs with strings, vectors, and emotives
-            return [create_gdf(
-                strings=[f"item_{i}_{j}" for j in range(int(complexity))],
-                vectors=[[float(j)/10 for j in range(int(5*complexity))]],
-                emotives={"importance": i/size, "urgency": (size-i)/size}
-            ) for i in range(size)]
+            vector = (np.arange(int(5*complexity), dtype=np.float64) / 10).tolist()
+            positions = np.arange(size, dtype=np.float64)
+            importance = (positions / size).tolist()
+            urgency = ((size - positions) / size).tolist()
+            return [{"vectors": [list(vector)],
+                     "strings": [f"item_{i}_{j}" for j in n_strings],
+                     "emotives": {"importance": imp, "urgency": urg},
+                     "metadata": {}}
+                    for i, imp, urg in zip(range(size), importance, urgency)]
         
         else:
             raise ValueError(f"Unknown data type: {data_type}")
@@ -258,6 +545,47 @@ def generate_test_data():
     return _generate_data
 
 
+# Number of training sequences built once per session; tests slice the
+# list, so it must cover the largest count any of them uses
+TRAINING_SEQUENCES = 50
+
+
+@pytest.fixture(scope="session")
+def training_sequences():
+    """Provides training sequences shared by every test in the session.
+    
+    Each sequence is two input events followed by a classification event,
+    all string-only GDFs unique to the sequence. The list is built once;
+    treat it and its events as read-only.
+    """
+    return [
+        [{"vectors": [], "strings": [f"seq_{i}_a"], "emotives": {}, "metadata": {}},
+         {"vectors": [], "strings": [f"seq_{i}_b"], "emotives": {}, "metadata": {}},
+         {"vectors": [], "strings": [f"class_{i}"], "emotives": {}, "metadata": {}}]
+        for i in range(TRAINING_SEQUENCES)
+    ]
+
+
+def _max_rss():
+    """The kernel's high-water mark of this process's RSS in bytes, or None."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Collect garbage, then keep the collector off for the duration of the block."""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
 @pytest.fixture
 def measure_memory():
     """Fixture to measure memory usage."""
@@ -265,43 +593,188 @@ def measure_memory():
         """
         Measure memory usage of a function.
         
+        Garbage collection is run beforehand and disabled during the call so
+        a collection cycle cannot fire mid-measurement. Process RSS is sampled
+        from a background thread to capture its peak. Where available, the
+        kernel's RSS high-water mark also catches peaks between samples; it
+        only moves when the call exceeds the highest RSS the process has ever
+        had. tracemalloc is not used here, since its per-block bookkeeping
+        would show up as RSS; see measure_python_memory.
+        
         Args:
             func: Function to measure
             *args, **kwargs: Arguments to pass to func
             
         Returns:
-            Tuple of (func_result, memory_stats)
+            Tuple of (func_result, memory_stats). memory_stats holds the RSS
+            before/after/diff, rss_peak and rss_high_water_delta (growth of
+            the process high-water mark).
         """
-        # Get baseline memory usage
         process = psutil.Process(os.getpid())
-        mem_before = process.memory_info().rss
-        
-        # Run the function
-        result = func(*args, **kwargs)
+        with _gc_paused():
+            # Get baseline memory usage
+            max_rss_before = _max_rss()
+            mem_before = process.memory_info().rss
+            rss_peak = mem_before
+            stop_sampling = threading.Event()
+            
+            def _sample_rss():
+                nonlocal rss_peak
+                while not stop_sampling.wait(MEMORY_SAMPLE_INTERVAL):
+                    rss_peak = max(rss_peak, process.memory_info().rss)
+            
+            sampler = threading.Thread(target=_sample_rss, daemon=True)
+            sampler.start()
+            try:
+                # Run the function
+                result = func(*args, **kwargs)
+            finally:
+                stop_sampling.set()
+                sampler.join()
+            
+            # Get memory usage after
+            mem_after = process.memory_info().rss
         
-        # Get memory usage after
-        mem_after = process.memory_info().rss
         mem_diff = mem_after - mem_before
+        rss_peak = max(rss_peak, mem_after)
+        
+        high_water_delta = 0
+        if max_rss_before is not None:
+            max_rss_after = _max_rss()
+            high_water_delta = max_rss_after - max_rss_before
+            if high_water_delta > 0:
+                # A new high-water mark was set during the call
+                rss_peak = max(rss_peak, max_rss_after)
         
         stats = {
             "memory_before": mem_before,
             "memory_after": mem_after, 
-            "memory_diff": mem_diff
+            "memory_diff": mem_diff,
+            "rss_peak": rss_peak,
+            "rss_high_water_delta": high_water_delta
         }
         
-        logger.info(f"Memory usage: {mem_diff / (1024*1024):.2f} MB")
+        logger.info(f"Memory usage: {mem_diff / (1024*1024):.2f} MB RSS")
         return result, stats
     
     return _measure_memory
 
 
+@pytest.fixture
+def measure_python_memory():
+    """Fixture to measure the Python allocations of a call with tracemalloc."""
+    def _measure_python_memory(func, *args, **kwargs):
+        """
+        Measure the bytes Python allocates during a function call.
+        
+        Unlike RSS these counts do not depend on how the allocator caches and
+        returns pages, so they are the stable metric for regressions. Tracing
+        inflates RSS, so run this in a separate pass from measure_memory.
+        
+        Args:
+            func: Function to measure
+            *args, **kwargs: Arguments to pass to func
+            
+        Returns:
+            Tuple of (func_result, memory_stats). memory_stats holds
+            python_current and python_peak: bytes allocated by Python during
+            the call that are still live, and at their peak.
+        """
+        with _gc_paused():
+            was_tracing = tracemalloc.is_tracing()
+            if not was_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            python_before, _ = tracemalloc.get_traced_memory()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                python_current, python_peak = tracemalloc.get_traced_memory()
+                if not was_tracing:
+                    tracemalloc.stop()
+        
+        stats = {
+            "python_current": python_current - python_before,
+            "python_peak": python_peak - python_before
+        }
+        
+        logger.info(f"Python allocations: {stats['python_peak'] / (1024*1024):.2f} MB peak, "
+                    f"{stats['python_current'] / (1024*1024):.2f} MB still live")
+        return result, stats
+    
+    return _measure_python_memory
+
+
+@pytest.fixture
+def track_allocations():
+    """Fixture attributing memory growth in a block to allocation sites.
+    
+    Returns a context manager yielding a list that, on exit, holds the
+    (site, size_diff, count_diff) tuples of the allocation sites that grew
+    most. Tracing slows down every allocation and its bookkeeping shows up
+    as RSS, so the fixture is None unless PERF_TEST_MEMPROFILE is enabled
+    and should not be used around RSS measurements.
+    """
+    if not MEMPROFILE:
+        return None
+    
+    @contextlib.contextmanager
+    def _track_allocations():
+        top = []
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        # Leave out tracemalloc's own bookkeeping
+        exclude = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        try:
+            before = tracemalloc.take_snapshot().filter_traces(exclude)
+            yield top
+            after = tracemalloc.take_snapshot().filter_traces(exclude)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        
+        top.extend((str(stat.traceback), stat.size_diff, stat.count_diff)
+                   for stat in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS])
+    
+    return _track_allocations
+
+
+def pytest_configure(config):
+    """Write the session's system information once, next to its results file."""
+    # Added to heavy parametrizations by pytest_collection_modifyitems
+    config.addinivalue_line("markers", "slow: mark a test as a potentially slow test")
+    if SAVE_RESULTS:
+        with open(os.path.join(RESULTS_DIR, f"system_info_{SESSION_ID}.json"), 'w') as f:
+            json.dump(_system_info(), f, indent=2)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Mark heavy parametrizations slow and skip slow tests at the standard level."""
+    # The hook receives every collected item, so in a combined run the
+    # other suites' tests are left alone
+    skip_slow = pytest.mark.skip(reason="Slow tests skipped in standard test level")
+    for item in items:
+        if PERF_TESTS_DIR not in item.path.parents:
+            continue
+        callspec = getattr(item, 'callspec', None)
+        if callspec is not None and any(callspec.params.get(name, 0) >= threshold
+                                        for name, threshold in SLOW_PARAM_THRESHOLDS.items()):
+            item.add_marker(pytest.mark.slow)
+        if TEST_LEVEL == 'standard' and 'slow' in item.keywords:
+            item.add_marker(skip_slow)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Flush queued log records and stop the logging listener thread."""
+    _log_listener.stop()
+
+
 def pytest_terminal_summary(terminalreporter, exitstatus, config):
     """Add performance test summary at the end of the test run."""
-    if not any(item.module.__name__.startswith('test_') for item in terminalreporter.stats.get('passed', [])):
-        return
-    
-    perf_passed = [item for item in terminalreporter.stats.get('passed', []) 
-                  if item.module.__name__.startswith('test_')]
+    # Reports carry their item's keywords, which include marker names
+    perf_passed = [report for report in terminalreporter.stats.get('passed', [])
+                   if 'performance' in getattr(report, 'keywords', {})]
     
     if not perf_passed:
         return
@@ -3,30 +3,47 @@ import pytest
 import logging
 import time
 import random
-import statistics
-import numpy as np
+import threading
+from functools import partial
 from typing import Dict, List, Any
-from threading import Thread
 
 logger = logging.getLogger('ia_performance_tests')
 
+# Static observations reused by the timed operations. AgentClient serializes
+# the payload on every call and never mutates it, so sharing them is safe.
+LATENCY_OBSERVATION = {"strings": ["latency_test"], "vectors": [], "emotives": {}}
+LOAD_OBSERVATION = {"strings": ["load_test"], "vectors": [], "emotives": {}}
+TRIGGER_OBSERVATION = {"strings": ["trigger"], "vectors": [], "emotives": {}}
+CONCURRENT_OBSERVATION = {"strings": ["concurrent_test"], "vectors": [], "emotives": {}}
+
+# Seconds to wait for the background thread to reach the start barrier
+BARRIER_TIMEOUT = 5.0
+
+
+def _run_after_barrier(barrier, func):
+    """Wait until the foreground side is ready, then run func."""
+    barrier.wait(timeout=BARRIER_TIMEOUT)
+    return func()
+
 
 @pytest.mark.performance
-def test_operation_response_time(perf_agent, time_execution, save_benchmark_results):
+def test_operation_response_time(perf_agent, measure_time_cm, save_benchmark_results, stats_from_times):
     """Test response time of key operations."""
     # Operations to measure
     operations = {
-        "observe": lambda: perf_agent.observe({"strings": ["latency_test"], "vectors": [], "emotives": {}}),
-        "learn": lambda: perf_agent.learn(),
-        "get_predictions": lambda: perf_agent.get_predictions(),
-        "get_wm": lambda: perf_agent.get_wm(),
-        "clear_wm": lambda: perf_agent.clear_wm(),
-        "show_status": lambda: perf_agent.show_status(),
-        "get_kbs_as_json": lambda: perf_agent.get_kbs_as_json(obj=True)
+        "observe": partial(perf_agent.observe, LATENCY_OBSERVATION),
+        "learn": perf_agent.learn,
+        "get_predictions": perf_agent.get_predictions,
+        "get_wm": perf_agent.get_wm,
+        "clear_wm": perf_agent.clear_wm,
+        "show_status": perf_agent.show_status
     }
     
     results = {}
     iterations = 10  # Number of measurements per operation
+    warmup_iterations = 2  # Discarded calls that absorb first-call effects
+    # Operations that trigger server-side work needing time to settle
+    settling_operations = {"learn"}
     
     # First clear all memory to start fresh
     perf_agent.clear_all_memory()
@@ -35,6 +52,9 @@ def test_operation_response_time(perf_agent, time_execution, save_benchmark_resu
     for op_name, op_func in operations.items():
         logger.info(f"Measuring response time for operation: {op_name}")
         
+        for _ in range(warmup_iterations):
+            op_func()
+        
         # Run multiple iterations
         times = []
         for i in range(iterations):
@@ -44,31 +64,23 @@ def test_operation_response_time(perf_agent, time_execution, save_benchmark_resu
                 perf_agent.observe({"strings": [f"latency_item_{i}"], "vectors": [], "emotives": {}})
             
             # Measure execution time
-            _, execution_time = time_execution(op_func)
-            times.append(execution_time)
+            with measure_time_cm() as elapsed_ns:
+                op_func()
+            times.append(elapsed_ns[0] / 1e9)
             
-            # Small delay between operations
-            time.sleep(0.1)
+            if op_name in settling_operations:
+                time.sleep(0.1)
         
         # Calculate statistics
-        mean_time = statistics.mean(times)
-        median_time = statistics.median(times)
-        stdev_time = statistics.stdev(times) if len(times) > 1 else 0
-        min_time = min(times)
-        max_time = max(times)
-        p95_time = np.percentile(times, 95)
+        stats = stats_from_times(times)
         
-        logger.info(f"{op_name} response time: mean={mean_time:.6f}s, median={median_time:.6f}s, p95={p95_time:.6f}s")
+        logger.info(f"{op_name} response time: mean={stats['mean']:.6f}s, median={stats['median']:.6f}s, p95={stats['p95']:.6f}s")
         
         # Store results
         results[op_name] = {
             "operation": op_name,
-            "mean_time": mean_time,
-            "median_time": median_time,
-            "stdev_time": stdev_time,
-            "min_time": min_time,
-            "max_time": max_time,
-            "p95_time": p95_time
+            "iterations": len(times),
+            **{f"{name}_time": value for name, value in stats.items()}
         }
         
         # Save results to file
@@ -81,7 +93,53 @@ def test_operation_response_time(perf_agent, time_execution, save_benchmark_resu
 
 
 @pytest.mark.performance
-def test_latency_under_load(perf_agent, time_execution, generate_test_data, save_benchmark_results):
+def test_kb_export_latency(perf_agent, time_execution, save_benchmark_results, stats_from_times):
+    """Test response time of exporting the KB as a Python object.
+
+    Export cost grows with the KB, so it is measured separately from the
+    lightweight operations, with fewer iterations.
+    """
+    iterations = 3
+    warmup_iterations = 1
+    
+    # Learn a few sequences so there is something to export
+    perf_agent.clear_all_memory()
+    for i in range(5):
+        perf_agent.observe({"strings": [f"kb_export_item_{i}"], "vectors": [], "emotives": {}})
+        perf_agent.learn()
+    
+    export_kb = partial(perf_agent.get_kbs_as_json, obj=True)
+    for _ in range(warmup_iterations):
+        kb = export_kb()
+    
+    if not kb or not any(node_kb.get("symbols_kb") for node_kb in kb.values()):
+        pytest.skip("KB is empty, nothing to export")
+    
+    times = []
+    for _ in range(iterations):
+        _, execution_time = time_execution(export_kb)
+        times.append(execution_time)
+    
+    stats = stats_from_times(times)
+    
+    logger.info(f"get_kbs_as_json response time: mean={stats['mean']:.6f}s, median={stats['median']:.6f}s, p95={stats['p95']:.6f}s")
+    
+    results = {
+        "operation": "get_kbs_as_json",
+        "iterations": len(times),
+        **{f"{name}_time": value for name, value in stats.items()}
+    }
+    
+    save_benchmark_results(
+        test_name="operation_latency_get_kbs_as_json",
+        results=results
+    )
+    
+    return results
+
+
+@pytest.mark.performance
+def test_latency_under_load(perf_agent, measure_time_cm, generate_test_data, save_benchmark_results, stats_from_times):
     """Test operation latency under different loads."""
     # Load parameters to test
     load_sizes = [10, 50, 100, 200]
@@ -107,10 +165,10 @@ def test_latency_under_load(perf_agent, time_execution, generate_test_data, save
         
         # Test operations under load
         operations = {
-            "observe": lambda: perf_agent.observe({"strings": ["load_test"], "vectors": [], "emotives": {}}),
-            "get_predictions": lambda: perf_agent.get_predictions(),
-            "clear_wm": lambda: perf_agent.clear_wm(),
-            "show_status": lambda: perf_agent.show_status()
+            "observe": partial(perf_agent.observe, LOAD_OBSERVATION),
+            "get_predictions": perf_agent.get_predictions,
+            "clear_wm": perf_agent.clear_wm,
+            "show_status": perf_agent.show_status
         }
         
         load_results = {}
@@ -118,29 +176,26 @@ def test_latency_under_load(perf_agent, time_execution, generate_test_data, save
             # Prepare for operation
             perf_agent.clear_wm()
             if op_name == "get_predictions":
-                perf_agent.observe({"strings": ["trigger"], "vectors": [], "emotives": {}})
+                perf_agent.observe(TRIGGER_OBSERVATION)
             
             # Measure the operation with 5 iterations
             times = []
             for i in range(5):
-                _, execution_time = time_execution(op_func)
-                times.append(execution_time)
+                with measure_time_cm() as elapsed_ns:
+                    op_func()
+                times.append(elapsed_ns[0] / 1e9)
                 time.sleep(0.1)  # Small delay
             
             # Calculate statistics
-            mean_time = statistics.mean(times)
-            median_time = statistics.median(times)
-            p95_time = np.percentile(times, 95) if len(times) >= 3 else max(times)
+            stats = stats_from_times(times)
             
-            logger.info(f"[Load {load_size}] {op_name} latency: mean={mean_time:.6f}s, median={median_time:.6f}s")
+            logger.info(f"[Load {load_size}] {op_name} latency: mean={stats['mean']:.6f}s, median={stats['median']:.6f}s")
             
             # Store operation results
             load_results[op_name] = {
                 "operation": op_name,
                 "load_size": load_size,
-                "mean_time": mean_time,
-                "median_time": median_time,
-                "p95_time": p95_time
+                **{f"{name}_time": value for name, value in stats.items()}
             }
             
             # Save individual operation results
@@ -159,7 +214,8 @@ def test_latency_under_load(perf_agent, time_execution, generate_test_data, save
 
 
 @pytest.mark.performance
-def test_concurrent_operation_latency(perf_agent, time_execution, save_benchmark_results):
+def test_concurrent_operation_latency(perf_agent, time_execution, save_benchmark_results, background_executor,
+                                      stats_from_times):
     """Test latency when performing concurrent operations."""
     # First clear all memory
     perf_agent.clear_all_memory()
@@ -173,20 +229,20 @@ def test_concurrent_operation_latency(perf_agent, time_execution, save_benchmark
     # Prepare concurrent operation scenarios
     concurrent_scenarios = [
         {"name": "observe_while_learning", 
-         "background": lambda: time.sleep(0.5) or perf_agent.learn(),
-         "foreground": lambda: perf_agent.observe({"strings": ["concurrent_test"], "vectors": [], "emotives": {}})},
+         "background": perf_agent.learn,
+         "foreground": partial(perf_agent.observe, CONCURRENT_OBSERVATION)},
          
         {"name": "predict_while_learning",
-         "background": lambda: time.sleep(0.5) or perf_agent.learn(),
-         "foreground": lambda: perf_agent.get_predictions()},
+         "background": perf_agent.learn,
+         "foreground": perf_agent.get_predictions},
         
         {"name": "status_while_observing",
          "background": lambda: [perf_agent.observe({"strings": [f"bg_{i}"], "vectors": [], "emotives": {}}) for i in range(10)],
-         "foreground": lambda: perf_agent.show_status()},
+         "foreground": perf_agent.show_status},
          
         {"name": "kb_export_while_learning",
-         "background": lambda: perf_agent.learn(),
-         "foreground": lambda: perf_agent.get_kbs_as_json(obj=True)}
+         "background": perf_agent.learn,
+         "foreground": partial(perf_agent.get_kbs_as_json, obj=True)}
     ]
     
     results = {}
@@ -198,39 +254,31 @@ def test_concurrent_operation_latency(perf_agent, time_execution, save_benchmark
         # Reset state before test
         perf_agent.clear_wm()
         
-        # Run the background operation in a thread
-        background_thread = Thread(target=scenario["background"])
-        background_thread.daemon = True
-        
         # Measure foreground operation with background running
         times = []
         iterations = 3
         
         for i in range(iterations):
-            # Start background operation
-            background_thread = Thread(target=scenario["background"])
-            background_thread.daemon = True
-            background_thread.start()
-            
-            # Allow background to start
-            time.sleep(0.1)
+            # Start background operation on a pooled thread; both sides
+            # leave the barrier together so the foreground call overlaps it
+            barrier = threading.Barrier(2)
+            background = background_executor.submit(_run_after_barrier, barrier, scenario["background"])
+            barrier.wait(timeout=BARRIER_TIMEOUT)
             
             # Measure foreground operation
             _, execution_time = time_execution(scenario["foreground"])
             times.append(execution_time)
             
             # Wait for background to finish
-            background_thread.join(timeout=5.0)
+            background.result(timeout=5.0)
             
             # Small delay between iterations
             time.sleep(0.5)
         
         # Calculate statistics
-        mean_time = statistics.mean(times)
-        median_time = statistics.median(times)
-        max_time = max(times)
+        stats = stats_from_times(times)
         
-        logger.info(f"Concurrent {scenario_name} latency: mean={mean_time:.6f}s, median={median_time:.6f}s, max={max_time:.6f}s")
+        logger.info(f"Concurrent {scenario_name} latency: mean={stats['mean']:.6f}s, median={stats['median']:.6f}s, max={stats['max']:.6f}s")
         
         # Also measure baseline (without concurrent operation)
         baseline_times = []
@@ -238,19 +286,17 @@ def test_concurrent_operation_latency(perf_agent, time_execution, save_benchmark
             _, execution_time = time_execution(scenario["foreground"])
             baseline_times.append(execution_time)
         
-        baseline_mean = statistics.mean(baseline_times)
-        logger.info(f"Baseline (without concurrent operation): mean={baseline_mean:.6f}s")
+        baseline_stats = stats_from_times(baseline_times)
+        logger.info(f"Baseline (without concurrent operation): mean={baseline_stats['mean']:.6f}s")
         
         # Calculate impact
-        latency_impact = (mean_time / baseline_mean) - 1.0  # Percentage increase
+        latency_impact = (stats['mean'] / baseline_stats['mean']) - 1.0  # Percentage increase
         
         # Store results
         results[scenario_name] = {
             "scenario": scenario_name,
-            "concurrent_mean_time": mean_time,
-            "concurrent_median_time": median_time,
-            "concurrent_max_time": max_time,
-            "baseline_mean_time": baseline_mean,
+            **{f"concurrent_{name}_time": value for name, value in stats.items()},
+            **{f"baseline_{name}_time": value for name, value in baseline_stats.items()},
             "latency_impact_pct": latency_impact * 100  # Convert to percentage
         }
         
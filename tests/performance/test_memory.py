@@ -1,22 +1,168 @@
 """Memory usage performance tests for the ia-sdk package."""
+import atexit
 import pytest
 import logging
 import time
 import gc
 import psutil
 import os
+import sys
+import threading
+import numpy as np
 from typing import Dict, List, Any
 
 logger = logging.getLogger('ia_performance_tests')
 
+# The test process, created once; psutil.Process() reads /proc on creation
+_PROC = psutil.Process(os.getpid())
+
+# On Linux RSS is read straight from /proc/self/statm, which skips psutil's
+# parsing and allocates almost nothing on the measuring path
+if sys.platform == 'linux':
+    _STATM_FD = os.open("/proc/self/statm", os.O_RDONLY)
+    atexit.register(os.close, _STATM_FD)
+    _PAGESIZE = os.sysconf('SC_PAGE_SIZE')
+else:
+    _STATM_FD = None
+
+# Seconds between RSS samples taken while the leak detection loops run
+LEAK_SAMPLE_INTERVAL = 0.01
+
+# Growth per iteration above which a well-fitting trend suggests a leak
+LEAK_THRESHOLD_BYTES = 50 * 1024
+# Minimum goodness of fit for a trend to count as sustained growth
+LEAK_MIN_R_SQUARED = 0.75
+
+
+def _fast_rss():
+    """Resident set size of this process in bytes."""
+    if _STATM_FD is None:
+        return _PROC.memory_info().rss
+    # statm holds "size resident shared ..." in pages
+    return int(os.pread(_STATM_FD, 64, 0).split(b' ', 2)[1]) * _PAGESIZE
+
+
+def _wait_rss_stable(eps=64 * 1024, max_wait=0.2, interval=0.01):
+    """Collect garbage until RSS settles, for at most max_wait seconds.
+    
+    Returns once two reads interval seconds apart differ by less than eps
+    bytes, so an already quiescent process returns after one interval.
+    """
+    gc.collect()
+    previous = _fast_rss()
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        gc.collect()
+        current = _fast_rss()
+        if abs(current - previous) < eps:
+            return current
+        previous = current
+    return previous
+
+
+def _linear_fit(x, y):
+    """Least-squares line through the points; returns (slope, r_squared).
+    
+    Returns (0, 0) when there are too few points or x does not vary.
+    """
+    if len(x) < 3 or np.ptp(x) == 0:
+        return 0, 0
+    slope, intercept = np.polyfit(x, y, 1)
+    ss_res = np.sum((y - (slope * x + intercept)) ** 2)
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    return slope, 1 - ss_res / ss_tot if ss_tot else 0
+
+
+def _lbr_detect(x, y, w_min=5, w_max=None, r2_min=LEAK_MIN_R_SQUARED,
+                threshold=LEAK_THRESHOLD_BYTES):
+    """Linear backward regression over the most recent samples.
+    
+    Fits lines to backward windows of the last w_min to w_max samples and
+    returns (window, slope, r_squared) for the longest window whose fit has
+    an R² of at least r2_min and a slope above threshold, or None. Early
+    samples such as warmup allocations only count if the trend extends back
+    over them.
+    """
+    w_max = min(w_max or len(x), len(x))
+    best = None
+    for window in range(w_min, w_max + 1):
+        slope, r_squared = _linear_fit(x[-window:], y[-window:])
+        if r_squared >= r2_min and slope > threshold:
+            best = (window, slope, r_squared)
+    return best
+
+
+class SamplingMemoryRecorder:
+    """Record RSS samples on a background thread.
+    
+    Each sample stores a timestamp, the RSS returned by ``read_rss`` and the
+    current iteration, in one preallocated column array per field. The measured code only sets
+    ``iteration`` as it makes progress, so no reads happen on its thread. A sample is also taken on entry and
+    exit; recording stops early once the array is full.
+    """
+    
+    def __init__(self, read_rss=_fast_rss, interval=LEAK_SAMPLE_INTERVAL, capacity=100_000):
+        self.read_rss = read_rss
+        self.interval = interval
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._rss = np.empty(capacity, dtype=np.int64)
+        self._iterations = np.empty(capacity, dtype=np.int64)
+        self.n = 0
+        self.iteration = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-recorder", daemon=True)
+    
+    def _sample(self):
+        n = self.n
+        if n < len(self._times):
+            self._times[n] = time.monotonic()
+            self._rss[n] = self.read_rss()
+            self._iterations[n] = self.iteration
+            self.n = n + 1
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+    
+    @property
+    def times(self):
+        """Monotonic timestamps of the samples recorded so far."""
+        return self._times[:self.n]
+    
+    @property
+    def rss(self):
+        """RSS in bytes of the samples recorded so far."""
+        return self._rss[:self.n]
+    
+    @property
+    def iteration_numbers(self):
+        """Iterations completed when each sample was taken."""
+        return self._iterations[:self.n]
+
 
 @pytest.mark.performance
-def test_memory_usage_patterns(perf_agent, measure_memory, generate_test_data, save_benchmark_results):
+def test_memory_usage_patterns(perf_agent, measure_memory, measure_python_memory, generate_test_data,
+                               save_benchmark_results):
     """Test memory usage patterns for different operations."""
+    # Generated before measuring so the data itself is not counted
+    batch_data = generate_test_data(data_type="strings", size=50)
+    
     # Operations to measure
     operations = {
         "observe_single": lambda agent: agent.observe({"strings": ["memory_test"], "vectors": [], "emotives": {}}),
-        "observe_batch": lambda agent: [agent.observe(event) for event in generate_test_data(data_type="strings", size=50)],
+        "observe_batch": lambda agent: [agent.observe(event) for event in batch_data],
         "learn": lambda agent: agent.learn(),
         "get_kb": lambda agent: agent.get_kbs_as_json(obj=True),
         "clear_wm": lambda agent: agent.clear_wm(),
@@ -29,7 +175,7 @@ def test_memory_usage_patterns(perf_agent, measure_memory, generate_test_data, s
     gc.collect()
     
     # Get process to monitor memory
-    process = psutil.Process(os.getpid())
+    process = _PROC
     base_memory = process.memory_info().rss
     logger.info(f"Base memory usage: {base_memory / (1024*1024):.2f} MB")
     
@@ -38,12 +184,17 @@ def test_memory_usage_patterns(perf_agent, measure_memory, generate_test_data, s
         
         # Reset state before test
         perf_agent.clear_all_memory()
-        time.sleep(1)  # Allow memory to stabilize
-        gc.collect()
+        _wait_rss_stable()  # Allow memory to stabilize
         
         # Measure memory usage
         _, memory_stats = measure_memory(lambda: op_func(perf_agent))
         
+        # Repeat from the same state with tracemalloc on; tracing inflates RSS,
+        # so Python allocations are measured in their own pass
+        perf_agent.clear_all_memory()
+        _wait_rss_stable()
+        _, python_stats = measure_python_memory(lambda: op_func(perf_agent))
+        
         # Calculate relative change
         memory_diff_mb = memory_stats["memory_diff"] / (1024 * 1024)
         memory_pct = (memory_stats["memory_diff"] / memory_stats["memory_before"]) * 100
@@ -56,7 +207,12 @@ def test_memory_usage_patterns(perf_agent, measure_memory, generate_test_data, s
             "memory_before_mb": memory_stats["memory_before"] / (1024 * 1024),
             "memory_after_mb": memory_stats["memory_after"] / (1024 * 1024),
             "memory_diff_mb": memory_diff_mb,
-            "memory_change_pct": memory_pct
+            "memory_change_pct": memory_pct,
+            "memory_peak_mb": memory_stats["rss_peak"] / (1024 * 1024),
+            "memory_peak_diff_mb": (memory_stats["rss_peak"] - memory_stats["memory_before"]) / (1024 * 1024),
+            "memory_high_water_diff_mb": memory_stats["rss_high_water_delta"] / (1024 * 1024),
+            "python_current_mb": python_stats["python_current"] / (1024 * 1024),
+            "python_peak_mb": python_stats["python_peak"] / (1024 * 1024)
         }
         
         # Save results
@@ -69,7 +225,8 @@ def test_memory_usage_patterns(perf_agent, measure_memory, generate_test_data, s
 
 
 @pytest.mark.performance
-def test_memory_leak_detection(perf_agent, measure_memory, generate_test_data, save_benchmark_results):
+def test_memory_leak_detection(perf_agent, measure_memory, generate_test_data, save_benchmark_results,
+                               track_allocations):
     """Test for potential memory leaks during repeated operations."""
     # Number of iterations for each test
     iterations = 20
@@ -97,63 +254,53 @@ def test_memory_leak_detection(perf_agent, measure_memory, generate_test_data, s
         
         # Reset state before test
         perf_agent.clear_all_memory()
-        time.sleep(1)  # Allow memory to stabilize
-        gc.collect()
+        # One untimed warmup run so one-time costs are not read as growth
+        op_func(perf_agent)
+        _wait_rss_stable()  # Allow memory to stabilize
         
-        # Get process to monitor memory
-        process = psutil.Process(os.getpid())
-        memory_measurements = []
+        # Perform operation repeatedly while RSS is sampled in the background
+        with SamplingMemoryRecorder() as recorder:
+            for i in range(iterations):
+                op_func(perf_agent)
+                recorder.iteration = i + 1
         
-        # Perform operation repeatedly
-        for i in range(iterations):
-            # Record memory before
-            memory_before = process.memory_info().rss
-            
-            # Perform operation
+        # When profiling, attribute growth to allocation sites in a second
+        # pass; tracemalloc's trace table grows with every live block, so
+        # tracing during the sampled loop would be read as a leak
+        top_allocations = []
+        if track_allocations is not None:
+            perf_agent.clear_all_memory()
             op_func(perf_agent)
-            
-            # Force garbage collection
-            gc.collect()
-            
-            # Record memory after
-            memory_after = process.memory_info().rss
-            memory_delta = memory_after - memory_before
-            memory_measurements.append((i, memory_before, memory_after, memory_delta))
-            
-            # Brief pause to stabilize
-            time.sleep(0.1)
+            with track_allocations() as top_allocations:
+                for _ in range(iterations):
+                    op_func(perf_agent)
         
-        # Analyze memory growth pattern
-        iteration_numbers = [m[0] for m in memory_measurements]
-        memory_deltas = [m[3] for m in memory_measurements]
+        # Analyze memory growth pattern; each sample is tagged with the
+        # number of iterations completed when it was taken
+        iteration_numbers = recorder.iteration_numbers
+        memory_usage = recorder.rss
         
         # Calculate metrics
-        total_memory_change = memory_measurements[-1][2] - memory_measurements[0][1]
-        avg_memory_change = total_memory_change / iterations
+        total_memory_change = memory_usage[-1] - memory_usage[0]
         memory_growth_rate = total_memory_change / iterations if iterations > 0 else 0
         
-        # Calculate slope of memory usage (for leak detection)
-        if len(memory_measurements) > 2:
-            # Use simple linear regression to estimate slope
-            mean_x = sum(iteration_numbers) / len(iteration_numbers)
-            mean_y = sum(memory_deltas) / len(memory_deltas)
-            numerator = sum((x - mean_x) * (y - mean_y) for x, y in zip(iteration_numbers, memory_deltas))
-            denominator = sum((x - mean_x) ** 2 for x in iteration_numbers)
-            slope = numerator / denominator if denominator != 0 else 0
-        else:
-            slope = 0
+        # Fit memory usage per iteration over the whole run
+        slope, r_squared = _linear_fit(iteration_numbers, memory_usage)
         
         # Log results
         logger.info(f"{op_name} memory growth: {total_memory_change / (1024*1024):.2f} MB over {iterations} iterations")
         logger.info(f"{op_name} memory growth rate: {memory_growth_rate / (1024*1024):.4f} MB/iteration")
         logger.info(f"{op_name} memory growth slope: {slope / (1024*1024):.6f} MB/iteration (stable should be near zero)")
         
-        # Potential leak detection
-        leak_threshold = 1024 * 50  # 50 KB per iteration is suspicious for a leak
-        leak_suspected = slope > leak_threshold
+        # Potential leak detection: only a sustained, well-fitting trend
+        # over the most recent samples counts
+        lbr = _lbr_detect(iteration_numbers, memory_usage)
+        leak_suspected = lbr is not None
+        lbr_window, lbr_slope, lbr_r_squared = lbr if leak_suspected else (0, 0, 0)
         
         if leak_suspected:
-            logger.warning(f"Potential memory leak detected in {op_name}: growth rate {slope / (1024*1024):.2f} MB/iteration")
+            logger.warning(f"Potential memory leak detected in {op_name}: growth rate {lbr_slope / (1024*1024):.2f} MB/iteration "
+                           f"over the last {lbr_window} samples (R²={lbr_r_squared:.2f})")
         else:
             logger.info(f"No significant memory leak detected in {op_name}")
         
@@ -161,11 +308,20 @@ def test_memory_leak_detection(perf_agent, measure_memory, generate_test_data, s
         results[op_name] = {
             "operation": op_name,
             "iterations": iterations,
+            "memory_samples": len(memory_usage),
             "total_memory_change_mb": total_memory_change / (1024*1024),
             "memory_growth_rate_mb": memory_growth_rate / (1024*1024),
             "memory_growth_slope_mb": slope / (1024*1024),
+            "memory_growth_r_squared": r_squared,
+            "leak_window_samples": lbr_window,
+            "leak_slope_mb": lbr_slope / (1024*1024),
+            "leak_r_squared": lbr_r_squared,
             "leak_suspected": leak_suspected
         }
+        if top_allocations:
+            results[op_name]["top_allocations"] = top_allocations
+            for site, size_diff, count_diff in top_allocations:
+                logger.info(f"  {site}: {size_diff / 1024:+.1f} KB in {count_diff:+d} blocks")
         
         # Save results
         save_benchmark_results(
@@ -198,29 +354,26 @@ def test_resource_cleanup_efficiency(perf_agent, measure_memory, generate_test_d
         load_key = f"load_{load_size}"
         load_results = {}
         
+        # Prepare test data, shared by every operation at this load
+        test_data = generate_test_data(data_type="mixed", size=load_size)
+        
         for op_name, op_func in operations.items():
-            # Prepare test data
-            test_data = generate_test_data(data_type="mixed", size=load_size)
-            
             # Reset agent state
             perf_agent.clear_all_memory()
             gc.collect()
             
-            # Monitor memory before loading data
-            process = psutil.Process(os.getpid())
-            memory_before_load = process.memory_info().rss
+            # Load data into agent, tracking memory before, after and at peak
+            def load_data():
+                for event in test_data:
+                    perf_agent.observe(event)
+                # Learn to create more resources to clean
+                perf_agent.learn()
             
-            # Load data into agent
             logger.info(f"Loading {load_size} items for {op_name} cleanup test")
-            for event in test_data:
-                perf_agent.observe(event)
-            
-            # Learn to create more resources to clean
-            perf_agent.learn()
-            
-            # Monitor memory after loading
-            memory_after_load = process.memory_info().rss
-            load_delta = memory_after_load - memory_before_load
+            _, load_stats = measure_memory(load_data)
+            memory_before_load = load_stats["memory_before"]
+            load_delta = load_stats["memory_after"] - memory_before_load
+            load_peak_delta = load_stats["rss_peak"] - memory_before_load
             
             # Measure the cleanup operation
             _, memory_stats = measure_memory(lambda: op_func(perf_agent))
@@ -228,11 +381,15 @@ def test_resource_cleanup_efficiency(perf_agent, measure_memory, generate_test_d
             # Calculate cleanup efficiency
             memory_freed = memory_stats["memory_diff"]  # Negative value means memory was freed
             cleanup_efficiency = abs(memory_freed) / load_delta if load_delta > 0 else 0
+            # Share of the memory held at the loading peak that the cleanup returns to
+            peak_reclaimed = load_stats["rss_peak"] - memory_stats["memory_after"]
+            peak_reclaim_efficiency = peak_reclaimed / load_peak_delta if load_peak_delta > 0 else 0
             
             logger.info(f"{op_name} cleanup with {load_size} items:")
             logger.info(f"  Loaded: {load_delta / (1024*1024):.2f} MB")
             logger.info(f"  Freed: {abs(memory_freed) / (1024*1024):.2f} MB")
             logger.info(f"  Efficiency: {cleanup_efficiency:.2%}")
+            logger.info(f"  Reclaimed from peak: {peak_reclaim_efficiency:.2%}")
             
             # Store results
             load_results[op_name] = {
@@ -240,7 +397,9 @@ def test_resource_cleanup_efficiency(perf_agent, measure_memory, generate_test_d
                 "load_size": load_size,
                 "memory_loaded_mb": load_delta / (1024*1024),
                 "memory_freed_mb": abs(memory_freed) / (1024*1024),
-                "cleanup_efficiency": cleanup_efficiency
+                "cleanup_efficiency": cleanup_efficiency,
+                "memory_load_peak_mb": load_peak_delta / (1024*1024),
+                "peak_reclaim_efficiency": peak_reclaim_efficiency
             }
             
             # Save results
@@ -1,15 +1,24 @@
 """Scalability performance tests for the ia-sdk package."""
 import pytest
 import logging
+import os
 import time
+import psutil
 import statistics
 import numpy as np
 import concurrent.futures
 from typing import Dict, List, Any
-from threading import Thread
+import threading
 
 logger = logging.getLogger('ia_performance_tests')
 
+# The test process, created once; psutil.Process() reads /proc on creation
+_PROC = psutil.Process(os.getpid())
+
+# Observations each concurrent observe task makes, so per-task overhead is
+# amortized and contention shows up above the noise
+OBSERVES_PER_TASK = 10
+
 
 @pytest.mark.performance
 def test_data_volume_scaling(perf_agent, benchmark_operation, generate_test_data, save_benchmark_results):
@@ -17,28 +26,34 @@ def test_data_volume_scaling(perf_agent, benchmark_operation, generate_test_data
     # Volume parameters to test (events per batch)
     volumes = [10, 50, 100, 250, 500]
     
+    # Generate all test data up front, outside the measurements
+    corpora = {volume: generate_test_data(data_type="strings", size=volume) for volume in volumes}
+    
     results = {}
     
     for volume in volumes:
         logger.info(f"Testing data volume scaling with {volume} events")
         
-        # Generate test data
-        test_data = generate_test_data(data_type="strings", size=volume)
+        test_data = corpora[volume]
         
         # Reset agent state
         perf_agent.clear_all_memory()
         
+        # Every run, warmup included, observes into an empty working memory
+        def clear_working_memory(iteration=0):
+            perf_agent.clear_wm()
+        
         # Define operation to benchmark - observing all events
         def observe_operation(agent=None, data=None):
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             for event in data:
                 agent.observe(event)
-            end_time = time.time()
-            return end_time - start_time
+            return (time.perf_counter_ns() - start_ns) / 1e9
         
         # Run the benchmark
         stats, operation_times = benchmark_operation(
             operation_func=observe_operation,
+            setup_func=clear_working_memory,
             agent=perf_agent,
             data=test_data,
             iterations=3  # Fewer iterations for large data volumes
@@ -50,16 +65,23 @@ def test_data_volume_scaling(perf_agent, benchmark_operation, generate_test_data
         logger.info(f"Data volume {volume}: {events_per_second:.2f} events/second")
         logger.info(f"Mean processing time: {stats['mean']:.4f}s")
         
+        # Learning consumes working memory, so each run, warmup included,
+        # re-observes the corpus first
+        def observe_corpus(iteration=0):
+            perf_agent.clear_wm()
+            for event in test_data:
+                perf_agent.observe(event)
+        
         # Now test learning performance
         def learn_operation(agent=None):
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             agent.learn()
-            end_time = time.time()
-            return end_time - start_time
+            return (time.perf_counter_ns() - start_ns) / 1e9
         
         # Run the learn benchmark
         learn_stats, learn_times = benchmark_operation(
             operation_func=learn_operation,
+            setup_func=observe_corpus,
             agent=perf_agent,
             iterations=3
         )
@@ -102,17 +124,26 @@ def test_operation_complexity_scaling(perf_agent, benchmark_operation, generate_
     # Fixed data size
     data_size = 50
     
+    # Generate complex test data with strings, vectors, and emotives up front
+    corpora = {
+        complexity: generate_test_data(data_type="mixed", size=data_size, complexity=complexity)
+        for complexity in complexities
+    }
+    
     results = {}
     
     for complexity in complexities:
         logger.info(f"Testing operation complexity scaling with complexity={complexity}")
         
-        # Generate complex test data with strings, vectors, and emotives
-        test_data = generate_test_data(data_type="mixed", size=data_size, complexity=complexity)
+        test_data = corpora[complexity]
         
         # Reset agent state
         perf_agent.clear_all_memory()
         
+        # Every run, warmup included, observes into an empty working memory
+        def clear_working_memory(iteration=0):
+            perf_agent.clear_wm()
+        
         # Define operation to benchmark - observing all events
         def observe_operation(agent=None, data=None):
             for event in data:
@@ -122,10 +153,18 @@ def test_operation_complexity_scaling(perf_agent, benchmark_operation, generate_
         # Run the benchmark
         stats, _ = benchmark_operation(
             operation_func=observe_operation,
+            setup_func=clear_working_memory,
             agent=perf_agent,
             data=test_data
         )
         
+        # Learning consumes working memory, so each run, warmup included,
+        # re-observes the corpus first
+        def observe_corpus(iteration=0):
+            perf_agent.clear_wm()
+            for event in test_data:
+                perf_agent.observe(event)
+        
         # Define learn operation to benchmark
         def learn_operation(agent=None):
             return agent.learn()
@@ -133,6 +172,7 @@ def test_operation_complexity_scaling(perf_agent, benchmark_operation, generate_
         # Run the learn benchmark
         learn_stats, _ = benchmark_operation(
             operation_func=learn_operation,
+            setup_func=observe_corpus,
             agent=perf_agent
         )
         
@@ -190,6 +230,9 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
     # Scale parameters
     scales = [10, 50, 100, 200]
     
+    # Generate all test data up front so it is not counted in the memory deltas
+    corpora = {scale: generate_test_data(data_type="mixed", size=scale) for scale in scales}
+    
     results = {}
     
     for scale in scales:
@@ -198,8 +241,7 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
         # Reset agent state
         perf_agent.clear_all_memory()
         
-        # Generate test data
-        test_data = generate_test_data(data_type="mixed", size=scale)
+        test_data = corpora[scale]
         
         # Measure memory usage during data loading
         def load_data(agent=None, data=None):
@@ -209,33 +251,30 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
             return len(data)
         
         # Measure memory and CPU during load
-        process = psutil.Process(os.getpid())
+        process = _PROC
         
-        # Baseline measurements
-        memory_before = process.memory_info().rss
-        cpu_percent_before = process.cpu_percent()
-        
-        # Reset CPU monitoring
-        process.cpu_percent()  # First call just resets monitoring
-        time.sleep(0.1)  # Wait a bit for CPU monitoring to initialize
+        # Baseline measurements; memory_full_info() reads RSS, VMS and USS at once
+        memory_before = process.memory_full_info()
+        cpu_before_ns = time.process_time_ns()
         
         # Run load operation and measure
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         load_data(perf_agent, test_data)
-        end_time = time.time()
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
         # After measurements
-        memory_after = process.memory_info().rss
-        cpu_percent_after = process.cpu_percent()
+        cpu_percent_after = (time.process_time_ns() - cpu_before_ns) / 1e9 / processing_time * 100
+        memory_after = process.memory_full_info()
         
         # Calculate metrics
-        memory_usage_mb = (memory_after - memory_before) / (1024 * 1024)
-        memory_per_event_kb = (memory_after - memory_before) / scale / 1024
-        processing_time = end_time - start_time
+        memory_usage_mb = (memory_after.rss - memory_before.rss) / (1024 * 1024)
+        memory_per_event_kb = (memory_after.rss - memory_before.rss) / scale / 1024
+        vms_usage_mb = (memory_after.vms - memory_before.vms) / (1024 * 1024)
+        uss_usage_mb = (memory_after.uss - memory_before.uss) / (1024 * 1024)
         events_per_second = scale / processing_time
         
         logger.info(f"Scale {scale}:")
-        logger.info(f"  Memory usage: {memory_usage_mb:.2f} MB")
+        logger.info(f"  Memory usage: {memory_usage_mb:.2f} MB (USS {uss_usage_mb:.2f} MB)")
         logger.info(f"  Memory per event: {memory_per_event_kb:.2f} KB")
         logger.info(f"  Processing time: {processing_time:.4f}s")
         logger.info(f"  CPU percentage: {cpu_percent_after:.1f}%")
@@ -251,20 +290,17 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
         cpu_percentages = []
         
         for i in range(5):
-            # Reset CPU monitoring
-            process.cpu_percent()
-            
             # Run query
-            start_time = time.time()
+            cpu_before_ns = time.process_time_ns()
+            start_ns = time.perf_counter_ns()
             query_operation(perf_agent)
-            end_time = time.time()
-            
-            query_times.append(end_time - start_time)
-            cpu_percentages.append(process.cpu_percent())
+            query_time = (time.perf_counter_ns() - start_ns) / 1e9
+            query_times.append(query_time)
+            cpu_percentages.append((time.process_time_ns() - cpu_before_ns) / 1e9 / query_time * 100)
         
         # Calculate query metrics
-        avg_query_time = sum(query_times) / len(query_times)
-        avg_cpu_percent = sum(cpu_percentages) / len(cpu_percentages)
+        avg_query_time = statistics.fmean(query_times)
+        avg_cpu_percent = statistics.fmean(cpu_percentages)
         
         logger.info(f"  Average query time: {avg_query_time:.4f}s")
         logger.info(f"  Average query CPU: {avg_cpu_percent:.1f}%")
@@ -274,6 +310,8 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
             "scale": scale,
             "memory_usage_mb": memory_usage_mb,
             "memory_per_event_kb": memory_per_event_kb,
+            "vms_usage_mb": vms_usage_mb,
+            "uss_usage_mb": uss_usage_mb,
             "loading_time": processing_time,
             "events_per_second": events_per_second,
             "cpu_percent": cpu_percent_after,
@@ -302,15 +340,52 @@ def test_resource_utilization_under_scale(perf_agent, measure_memory, generate_t
     return results
 
 
+def _run_concurrent_round(executor, active_agents, op_name, op_func, test_data):
+    """Run op_func once per agent concurrently and return the elapsed seconds.
+    
+    Any preparation runs on the pool before the clock starts, so only the
+    operation itself is timed.
+    """
+    data = test_data[0]
+    if op_name == "predict":
+        # Ensure working memory is set up for prediction
+        def prepare_for_predict(agent):
+            agent.clear_wm()
+            agent.observe(data)
+        
+        list(executor.map(prepare_for_predict, active_agents))
+    elif op_name == "learn":
+        # Learning consumes working memory, so every round, the warmup
+        # included, learns the same freshly observed sequence
+        def prepare_for_learn(agent):
+            agent.clear_wm()
+            for event in test_data:
+                agent.observe(event)
+        
+        list(executor.map(prepare_for_learn, active_agents))
+    
+    start_ns = time.perf_counter_ns()
+    futures = [executor.submit(op_func, agent, data) for agent in active_agents]
+    concurrent.futures.wait(futures)
+    total_time = (time.perf_counter_ns() - start_ns) / 1e9
+    
+    for future in futures:
+        exc = future.exception()
+        if exc is not None:
+            logger.error(f"Operation generated an exception: {exc}")
+    return total_time
+
+
 @pytest.mark.performance
-def test_concurrent_operation_scaling(perf_agent_manager, time_execution, generate_test_data, save_benchmark_results):
+def test_concurrent_operation_scaling(perf_agent_manager, time_execution, generate_test_data, save_benchmark_results,
+                                      pin_worker):
     """Test how performance scales with concurrent operations."""
     # Concurrency levels to test
     concurrency_levels = [1, 2, 4, 8]
     
     # Operations to test concurrently
     operations = {
-        "observe": lambda agent, data: agent.observe(data),
+        "observe": lambda agent, data: [agent.observe(data) for _ in range(OBSERVES_PER_TASK)],
         "learn": lambda agent, data: agent.learn(),
         "predict": lambda agent, data: agent.get_predictions()
     }
@@ -324,142 +399,108 @@ def test_concurrent_operation_scaling(perf_agent_manager, time_execution, genera
     # Pre-populate all agents with same baseline data
     baseline_data = generate_test_data(data_type="strings", size=20)
     
-    for op_name, op_func in operations.items():
-        logger.info(f"Testing concurrent scaling for operation: {op_name}")
-        
-        operation_results = {}
-        
-        for concurrency in concurrency_levels:
-            logger.info(f"Testing with concurrency level: {concurrency}")
+    # One pool for every round, sized for the highest concurrency level, with
+    # its threads started up front so thread creation is never measured. The
+    # barrier holds every task until all workers run, so each worker is
+    # pinned to its own CPU when pinning is enabled.
+    max_workers = max(concurrency_levels)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    warmup = threading.Barrier(max_workers)
+    
+    def start_worker(index):
+        pin_worker(index)
+        warmup.wait()
+    
+    concurrent.futures.wait([executor.submit(start_worker, i) for i in range(max_workers)])
+    
+    try:
+        for op_name, op_func in operations.items():
+            logger.info(f"Testing concurrent scaling for operation: {op_name}")
             
-            # Create or ensure we have enough agents
-            while len(agents) < concurrency:
-                agent_id = f"perf-concurrent-{len(agents)}"
-                agent_obj = perf_agent_manager.start_agent(
-                    genome_name="simple.genome",
-                    agent_id=agent_id,
-                    agent_name=agent_id
-                )
-                agent = agent_obj.get_agent_client()
-                agent.connect()
-                agent.set_ingress_nodes(["P1"])
-                agent.set_query_nodes(["P1"])
+            operation_results = {}
+            
+            for concurrency in concurrency_levels:
+                logger.info(f"Testing with concurrency level: {concurrency}")
                 
-                # Pre-populate with common data
-                for event in baseline_data:
-                    agent.observe(event)
-                agent.learn()
+                # Create or ensure we have enough agents
+                while len(agents) < concurrency:
+                    agent_id = f"perf-concurrent-{len(agents)}"
+                    agent_obj = perf_agent_manager.start_agent(
+                        genome_name="simple.genome",
+                        agent_id=agent_id,
+                        agent_name=agent_id
+                    )
+                    agent = agent_obj.get_agent_client()
+                    agent.connect()
+                    agent.set_ingress_nodes(["P1"])
+                    agent.set_query_nodes(["P1"])
+                    
+                    # Pre-populate with common data
+                    for event in baseline_data:
+                        agent.observe(event)
+                    agent.learn()
+                    
+                    agents.append(agent)
                 
-                agents.append(agent)
-            
-            # Prepare the concurrent execution
-            active_agents = agents[:concurrency]
-            execution_times = []
-            
-            # Run concurrent operations using ThreadPoolExecutor
-            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
-                # Start operation timing
-                start_time = time.time()
+                # Prepare the concurrent execution
+                active_agents = agents[:concurrency]
                 
-                # Submit all operations to executor
-                futures = []
-                for agent in active_agents:
-                    if op_name == "observe":
-                        futures.append(executor.submit(op_func, agent, test_data[0]))
-                    elif op_name == "predict":
-                        # Ensure working memory is set up for prediction
-                        agent.clear_wm()
-                        agent.observe(test_data[0])
-                        futures.append(executor.submit(op_func, agent, None))
-                    else:
-                        futures.append(executor.submit(op_func, agent, None))
+                # Each round submits exactly one task per active agent, so at
+                # most `concurrency` workers of the shared pool are busy. One
+                # untimed warmup round runs first and is discarded.
+                _run_concurrent_round(executor, active_agents, op_name, op_func, test_data)
+                execution_times = [
+                    _run_concurrent_round(executor, active_agents, op_name, op_func, test_data)
+                    for _ in range(3)
+                ]
                 
-                # Wait for all operations to complete
-                for future in concurrent.futures.as_completed(futures):
-                    try:
-                        future.result()
-                    except Exception as exc:
-                        logger.error(f"Operation generated an exception: {exc}")
+                # Calculate statistics
+                avg_execution_time = statistics.fmean(execution_times)
+                max_execution_time = max(execution_times)
+                ops_per_task = OBSERVES_PER_TASK if op_name == "observe" else 1
+                throughput = concurrency * ops_per_task / avg_execution_time  # Operations per second
                 
-                # End operation timing
-                end_time = time.time()
-                total_time = end_time - start_time
-                execution_times.append(total_time)
-            
-            # Run multiple iterations to get better statistics
-            for i in range(2):  # 2 more iterations
-                with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
-                    # Start operation timing
-                    start_time = time.time()
-                    
-                    # Submit all operations to executor
-                    futures = []
-                    for agent in active_agents:
-                        if op_name == "observe":
-                            futures.append(executor.submit(op_func, agent, test_data[0]))
-                        elif op_name == "predict":
-                            # Ensure working memory is set up for prediction
-                            agent.clear_wm()
-                            agent.observe(test_data[0])
-                            futures.append(executor.submit(op_func, agent, None))
-                        else:
-                            futures.append(executor.submit(op_func, agent, None))
-                    
-                    # Wait for all operations to complete
-                    for future in concurrent.futures.as_completed(futures):
-                        try:
-                            future.result()
-                        except Exception as exc:
-                            logger.error(f"Operation generated an exception: {exc}")
-                    
-                    # End operation timing
-                    end_time = time.time()
-                    total_time = end_time - start_time
-                    execution_times.append(total_time)
-            
-            # Calculate statistics
-            avg_execution_time = sum(execution_times) / len(execution_times)
-            max_execution_time = max(execution_times)
-            throughput = concurrency / avg_execution_time  # Operations per second
-            
-            logger.info(f"Concurrency {concurrency} for {op_name}:")
-            logger.info(f"  Average execution time: {avg_execution_time:.4f}s")
-            logger.info(f"  Throughput: {throughput:.2f} ops/sec")
-            
-            # Calculate efficiency (ideal vs. actual)
-            if concurrency == 1:
-                # Baseline for single operation
-                baseline_time = avg_execution_time
-                efficiency = 1.0
-            else:
-                # Ideal: linear scaling (N operations should take the same time as 1 operation)
-                # Actual: Measured time for N concurrent operations
-                # Efficiency = ideal / actual = baseline / (avg_time * concurrency/1)
-                efficiency = baseline_time / (avg_execution_time * concurrency)
-            
-            logger.info(f"  Parallelization efficiency: {efficiency:.2%}")
-            
-            # Store results
-            operation_results[concurrency] = {
-                "operation": op_name,
-                "concurrency": concurrency,
-                "avg_execution_time": avg_execution_time,
-                "max_execution_time": max_execution_time,
-                "throughput": throughput,
-                "efficiency": efficiency
-            }
-            
-            # Save results
-            save_benchmark_results(
-                test_name=f"concurrent_scaling_{op_name}_{concurrency}",
-                results=operation_results[concurrency]
-            )
+                logger.info(f"Concurrency {concurrency} for {op_name}:")
+                logger.info(f"  Average execution time: {avg_execution_time:.4f}s")
+                logger.info(f"  Throughput: {throughput:.2f} ops/sec")
+                
+                # Calculate efficiency (ideal vs. actual)
+                if concurrency == 1:
+                    # Baseline for single operation
+                    baseline_time = avg_execution_time
+                    efficiency = 1.0
+                else:
+                    # Ideal: linear scaling (N operations should take the same time as 1 operation)
+                    # Actual: Measured time for N concurrent operations
+                    # Efficiency = ideal / actual = baseline / (avg_time * concurrency/1)
+                    efficiency = baseline_time / (avg_execution_time * concurrency)
+                
+                logger.info(f"  Parallelization efficiency: {efficiency:.2%}")
+                
+                # Store results
+                operation_results[concurrency] = {
+                    "operation": op_name,
+                    "concurrency": concurrency,
+                    "ops_per_task": ops_per_task,
+                    "avg_execution_time": avg_execution_time,
+                    "max_execution_time": max_execution_time,
+                    "throughput": throughput,
+                    "efficiency": efficiency
+                }
+                
+                # Save results
+                save_benchmark_results(
+                    test_name=f"concurrent_scaling_{op_name}_{concurrency}",
+                    results=operation_results[concurrency]
+                )
+                
+                # Reset agents for next test
+                for agent in active_agents:
+                    agent.clear_wm()
             
-            # Reset agents for next test
-            for agent in active_agents:
-                agent.clear_wm()
-        
-        results[op_name] = operation_results
+            results[op_name] = operation_results
+    finally:
+        executor.shutdown(wait=True)
     
     # Clean up agents
     for i, agent in enumerate(agents):
@@ -467,6 +508,3 @@ def test_concurrent_operation_scaling(perf_agent_manager, time_execution, genera
     
     return results
 
-
-import psutil
-import os
@@ -6,6 +6,7 @@ import logging
 import tempfile
 import requests
 import uuid
+from pathlib import Path
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -32,6 +33,14 @@ DEFAULT_CLEANUP = os.getenv('GAIUS_TEST_CLEANUP', 'true').lower() == 'true'
 DEFAULT_API_KEY = os.getenv('GAIUS_API_KEY')
 DEFAULT_DOMAIN = os.getenv('GAIUS_DOMAIN')
 TEST_LEVEL = os.getenv('GAIUS_TEST_LEVEL', 'standard')
+# pytest-xdist worker running this session, or None outside xdist
+XDIST_WORKER = os.getenv('PYTEST_XDIST_WORKER')
+# Prefix keeping agent names unique across concurrent xdist workers
+AGENT_PREFIX = f"test-{XDIST_WORKER}" if XDIST_WORKER else "test"
+# Directory holding the system tests; the collection hook only touches these
+SYSTEM_TESTS_DIR = Path(__file__).resolve().parent
+# Temporary directories live on tmpfs where available
+TEMP_DIR_BASE = '/dev/shm' if os.path.isdir('/dev/shm') else None
 
 
 @pytest.fixture(scope="session")
@@ -41,15 +50,27 @@ def agent_manager():
     manager.start_hoster()
     yield manager
     
-    if DEFAULT_CLEANUP:
+    # Under xdist, other workers may still be using their agents, so each
+    # worker only removes the agents its fixtures started
+    if DEFAULT_CLEANUP and not XDIST_WORKER:
         logger.info("Cleaning up all agents after tests")
         manager.kill_all_agents()
 
 
-@pytest.fixture(scope="function")
-def temp_agent(agent_manager):
-    """Provides a temporary agent for a test function and ensures cleanup."""
-    agent_id = f"test-agent-{uuid.uuid4().hex[:8]}"
+def _unique_agent_name(role="agent"):
+    """Agent name unique across tests and concurrent xdist workers."""
+    return f"{AGENT_PREFIX}-{role}-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture(scope="session")
+def unique_agent_name():
+    """Provides a callable generating agent names for tests that start their own agents."""
+    return _unique_agent_name
+
+
+def _start_temp_agent(agent_manager):
+    """Start a simple.genome agent and return its connected client and name."""
+    agent_id = _unique_agent_name()
     agent_name = agent_id
     
     logger.info(f"Starting temporary agent {agent_name}")
@@ -67,6 +88,56 @@ def temp_agent(agent_manager):
     
     # Log agent info
     logger.info(f"Temporary agent {agent_name} started successfully")
+    return agent, agent_name
+
+
+@pytest.fixture(scope="session")
+def pooled_agent(agent_manager):
+    """Provides one agent shared by every temp_agent test in the session.
+    
+    Yields the client together with the genes it started with, so they can
+    be restored between tests.
+    """
+    agent, agent_name = _start_temp_agent(agent_manager)
+    genes = agent.get_all_genes()
+    
+    yield agent, genes
+    
+    if DEFAULT_CLEANUP:
+        logger.info(f"Cleaning up pooled agent {agent_name}")
+        agent_manager.delete_agent(agent_name)
+
+
+def _reset_agent(agent, genes):
+    """Return a pooled agent to the state of a freshly started one."""
+    agent.set_summarize_for_single_node(True)
+    agent.stop_sleeping()
+    agent.clear_all_memory()
+    agent.start_predicting()
+    agent.set_ingress_nodes(["P1"])
+    agent.set_query_nodes(["P1"])
+    
+    # Only genes a previous test changed are written back
+    current = agent.get_all_genes()
+    changed = {gene: value for gene, value in genes.items() if current.get(gene) != value}
+    if changed:
+        agent.change_genes(changed)
+
+
+@pytest.fixture(scope="function")
+def temp_agent(request, agent_manager, pooled_agent):
+    """Provides a clean agent for a test function.
+    
+    The session's pooled agent is reset and reused; tests marked
+    ``fresh_agent`` get a newly started agent that is removed afterwards.
+    """
+    if request.node.get_closest_marker("fresh_agent") is None:
+        agent, genes = pooled_agent
+        _reset_agent(agent, genes)
+        yield agent
+        return
+    
+    agent, agent_name = _start_temp_agent(agent_manager)
     
     yield agent
     
@@ -75,6 +146,22 @@ def temp_agent(agent_manager):
         agent_manager.delete_agent(agent_name)
 
 
+@pytest.fixture(scope="module")
+def module_agent(agent_manager):
+    """Provides a newly started agent shared by the tests of one module.
+    
+    Unlike temp_agent it is not reset between tests, so module-scoped
+    fixtures can prepare its state once for several tests.
+    """
+    agent, agent_name = _start_temp_agent(agent_manager)
+    
+    yield agent
+    
+    if DEFAULT_CLEANUP:
+        logger.info(f"Cleaning up module agent {agent_name}")
+        agent_manager.delete_agent(agent_name)
+
+
 @pytest.fixture(scope="function")
 def remote_agent():
     """Provides a remote agent client for a test function."""
@@ -105,16 +192,62 @@ def remote_agent():
         pytest.skip(f"Network error connecting to remote agent: {str(e)}")
 
 
+def _leaf_strings(obj, out=None):
+    """Collect every string nested in dicts, lists and tuples into a set."""
+    if out is None:
+        out = set()
+    if isinstance(obj, str):
+        out.add(obj)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _leaf_strings(value, out)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            _leaf_strings(value, out)
+    return out
+
+
+def _node_result(response, node='P1'):
+    """Return the node's entry from a per-node response.
+    
+    Responses that are not keyed by node (single-node summaries) are
+    returned unchanged.
+    """
+    if isinstance(response, dict) and node in response:
+        return response[node]
+    return response
+
+
+@pytest.fixture(scope="session")
+def node_result():
+    """Provides a function returning the P1 part of an agent response."""
+    return _node_result
+
+
+@pytest.fixture(scope="session")
+def leaf_strings():
+    """Provides a function returning the set of strings nested in a response.
+    
+    Membership in the set checks for an exact symbol, where searching the
+    response's repr would also match substrings.
+    """
+    return _leaf_strings
+
+
 @pytest.fixture(scope="function")
 def temp_directory():
     """Provides a temporary directory for a test function."""
-    with tempfile.TemporaryDirectory() as temp_dir:
+    with tempfile.TemporaryDirectory(dir=TEMP_DIR_BASE, ignore_cleanup_errors=True) as temp_dir:
         yield temp_dir
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def sample_data():
-    """Provides sample data for testing."""
+    """Provides sample data for testing.
+    
+    The data is built once and shared by every test in the session; treat
+    it as read-only.
+    """
     data = {
         "simple_strings": ["hello", "world", "test"],
         "nested_sequence": [
@@ -137,10 +270,15 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "advanced: mark a test as an advanced functionality test")
     config.addinivalue_line("markers", "slow: mark a test as a potentially slow test")
     config.addinivalue_line("markers", "docker: mark a test as requiring Docker")
+    config.addinivalue_line("markers", "fresh_agent: give the test a newly started agent instead of the pooled one")
     
 
 def pytest_collection_modifyitems(config, items):
     """Filter tests based on TEST_LEVEL environment variable."""
+    # The hook receives every collected item, so in a combined run the
+    # other suites' tests are left alone
+    items = [item for item in items if SYSTEM_TESTS_DIR in item.path.parents]
+    
     if TEST_LEVEL == 'minimal':
         skip_non_basic = pytest.mark.skip(reason="Test skipped in minimal test level")
         for item in items:
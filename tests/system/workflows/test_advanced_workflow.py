@@ -5,23 +5,25 @@ import json
 import pytest
 import logging
 import numpy as np
-from typing import Dict, List, Any
 
 from ia.gaius.utils import create_gdf
-from ia.gaius.data_ops import validate_data
-from ia.gaius.data_structures import PredictionEnsemble
 
 logger = logging.getLogger('ia_system_tests')
 
+# Event lists the tests observe in loops, built once at import; they are
+# never modified
+PERF_EVENTS = [create_gdf(strings=[f"perf_event_{i}"]) for i in range(20)]
+RESOURCE_EVENTS = [create_gdf(strings=[f"resource_event_{i}"]) for i in range(10)]
+ALLOCATION_EVENTS = [create_gdf(strings=[f"allocation_event_{i}"]) for i in range(5)]
+MEMORY_LOAD_EVENTS = [create_gdf(strings=[f"memory_intensive_event_{i}"]) for i in range(100)]
+# Timed observe + get_predictions rounds per test_prediction_latency case
+PREDICTION_SAMPLES = 10
 
-@pytest.mark.advanced
-def test_complex_data_processing(temp_agent, sample_data):
-    """Test complex data processing with different data types."""
-    # Clear working memory
-    temp_agent.clear_all_memory()
-    
-    # Create a sequence with mixed data types
-    mixed_data_sequence = [
+
+@pytest.fixture(scope="module")
+def mixed_sequence(sample_data):
+    """Provides a read-only sequence of events with mixed data types."""
+    return [
         # Simple strings
         create_gdf(strings=sample_data["simple_strings"]),
         
@@ -41,9 +43,27 @@ def test_complex_data_processing(temp_agent, sample_data):
         # Classification event
         create_gdf(strings=["complex_class"])
     ]
+
+
+@pytest.fixture(scope="module")
+def trained_agent(module_agent):
+    """Provides the module's agent with a model learned from PERF_EVENTS."""
+    module_agent.clear_all_memory()
+    for event in PERF_EVENTS:
+        module_agent.observe(event)
+    module_agent.learn()
+    module_agent.start_predicting()
+    return module_agent
+
+
+@pytest.mark.advanced
+def test_complex_data_processing(temp_agent, sample_data, mixed_sequence, leaf_strings, node_result):
+    """Test complex data processing with different data types."""
+    # Clear working memory
+    temp_agent.clear_all_memory()
     
     # Observe all events and learn
-    for event in mixed_data_sequence:
+    for event in mixed_sequence:
         temp_agent.observe(event)
     
     # Learn from the sequence
@@ -55,20 +75,17 @@ def test_complex_data_processing(temp_agent, sample_data):
     assert wm is not None
     
     # Check working memory contents
-    if isinstance(wm, dict) and 'P1' in wm:
-        wm_content = wm['P1']
-    else:
-        wm_content = wm
+    wm_content = node_result(wm)
     
     # Verify the various data types are present
-    content_str = str(wm_content)
-    assert any(s in content_str for s in sample_data["simple_strings"])
-    assert "vector_event" in content_str
-    assert "emotive_event" in content_str
-    assert "complex_class" in content_str
+    symbols = leaf_strings(wm_content)
+    assert any(s in symbols for s in sample_data["simple_strings"])
+    assert "vector_event" in symbols
+    assert "emotive_event" in symbols
+    assert "complex_class" in symbols
     
     # Verify vectors were processed
-    model_name = learn_result['P1'] if isinstance(learn_result, dict) and 'P1' in learn_result else learn_result
+    model_name = node_result(learn_result)
     model = temp_agent.get_model(model_name)
     
     if isinstance(model, dict) and 'sequence' in model:
@@ -80,11 +97,11 @@ def test_complex_data_processing(temp_agent, sample_data):
 
 @pytest.mark.advanced
 @pytest.mark.slow
-def test_multi_agent_interaction(agent_manager):
+def test_multi_agent_interaction(agent_manager, unique_agent_name):
     """Test interactions between multiple agents."""
     # Create two agents: a source and a target
-    source_agent_name = f"test-source-{os.urandom(4).hex()}"
-    target_agent_name = f"test-target-{os.urandom(4).hex()}"
+    source_agent_name = unique_agent_name("source")
+    target_agent_name = unique_agent_name("target")
     
     source_agent_obj = agent_manager.start_agent(
         genome_name="simple.genome",
@@ -180,14 +197,12 @@ def test_state_persistence_and_recovery(temp_agent, temp_directory):
     learn_result = temp_agent.learn()
     assert learn_result is not None
     
-    # 2. Save the KB to a file
+    # 2. Save the KB to a file; the client writes the export directly
     kb_file = os.path.join(temp_directory, "agent_kb.json")
-    kb_data = temp_agent.get_kbs_as_json(obj=True)
-    
-    with open(kb_file, 'w') as f:
-        json.dump(kb_data, f)
+    saved_files = temp_agent.get_kbs_as_json(filename=kb_file)
     
     # Verify file was created
+    assert saved_files == [kb_file]
     assert os.path.exists(kb_file)
     
     # 3. Clear the agent's memory
@@ -198,7 +213,7 @@ def test_state_persistence_and_recovery(temp_agent, temp_directory):
     
     if isinstance(kb_after_clear, dict) and 'P1' in kb_after_clear:
         symbols_after_clear = kb_after_clear['P1']['symbols_kb']
-        assert "persistence1" not in str(symbols_after_clear)
+        assert "persistence1" not in symbols_after_clear
     
     # 4. Load the saved KB back
     temp_agent.load_kbs_from_json(path=kb_file)
@@ -208,7 +223,7 @@ def test_state_persistence_and_recovery(temp_agent, temp_directory):
     
     if isinstance(kb_after_load, dict) and 'P1' in kb_after_load:
         symbols_after_load = kb_after_load['P1']['symbols_kb']
-        assert "persistence" in str(symbols_after_load)
+        assert any("persistence" in symbol for symbol in symbols_after_load)
     
     # 6. Test that the restored knowledge works
     temp_agent.clear_wm()  # Clear working memory but keep KB
@@ -234,27 +249,25 @@ def test_performance_monitoring(temp_agent):
     # Clear any existing memory
     temp_agent.clear_all_memory()
     
-    # Create a large dataset to test performance
-    large_sequence = []
-    for i in range(20):  # Create 20 events
-        large_sequence.append(create_gdf(strings=[f"perf_event_{i}"]))
-    
-    # 1. Measure response time for observations
-    observation_times = []
-    for event in large_sequence:
-        start_time = time.time()
+    # 1. Measure response time for observations over a large dataset; each
+    # observation is timed from the end of the previous one in nanoseconds
+    observation_times = np.empty(len(PERF_EVENTS), dtype=np.int64)
+    previous_ns = time.perf_counter_ns()
+    for i, event in enumerate(PERF_EVENTS):
         temp_agent.observe(event)
-        end_time = time.time()
-        observation_times.append(end_time - start_time)
+        now_ns = time.perf_counter_ns()
+        observation_times[i] = now_ns - previous_ns
+        previous_ns = now_ns
     
-    # Calculate average observation time
-    avg_observation_time = sum(observation_times) / len(observation_times)
-    logger.info(f"Average observation time: {avg_observation_time:.6f} seconds")
+    # Summarize observation times
+    logger.info("Observation time: mean=%.3fms p50=%.3fms p90=%.3fms max=%.3fms",
+                observation_times.mean() / 1e6, np.median(observation_times) / 1e6,
+                np.percentile(observation_times, 90) / 1e6, observation_times.max() / 1e6)
     
     # 2. Test memory usage before and after learning
     # Get KB size before learning
     kb_before = temp_agent.get_kbs_as_json(obj=True)
-    kb_size_before = len(str(kb_before))
+    kb_size_before = len(json.dumps(kb_before))
     
     # Learn from the sequence
     learn_result = temp_agent.learn()
@@ -262,82 +275,68 @@ def test_performance_monitoring(temp_agent):
     
     # Get KB size after learning
     kb_after = temp_agent.get_kbs_as_json(obj=True)
-    kb_size_after = len(str(kb_after))
+    kb_size_after = len(json.dumps(kb_after))
     
     # Memory usage should increase after learning
     assert kb_size_after > kb_size_before
-    logger.info(f"KB size before learning: {kb_size_before} bytes")
-    logger.info(f"KB size after learning: {kb_size_after} bytes")
-    logger.info(f"KB size increase: {kb_size_after - kb_size_before} bytes")
-    
-    # 3. Measure prediction performance
-    temp_agent.start_predicting()
-    
-    # Create test sequences
-    test_sequences = [
-        create_gdf(strings=["perf_event_0"]),  # First event in training
-        create_gdf(strings=["perf_event_10"]),  # Middle event in training
-        create_gdf(strings=["perf_event_19"]),  # Last event in training
-        create_gdf(strings=["unknown_event"])   # Not in training
-    ]
+    logger.info("KB size before learning: %d bytes", kb_size_before)
+    logger.info("KB size after learning: %d bytes", kb_size_after)
+    logger.info("KB size increase: %d bytes", kb_size_after - kb_size_before)
     
-    # Measure prediction time for each sequence
-    prediction_times = []
-    prediction_counts = []
-    
-    for test_sequence in test_sequences:
-        temp_agent.clear_wm()
-        
-        # Measure time to observe and predict
-        start_time = time.time()
-        temp_agent.observe(test_sequence)
-        predictions = temp_agent.get_predictions()
-        end_time = time.time()
-        
-        prediction_time = end_time - start_time
-        prediction_times.append(prediction_time)
-        
-        # Count predictions
-        if isinstance(predictions, dict) and 'P1' in predictions:
-            prediction_count = len(predictions['P1'])
-        else:
-            prediction_count = 0
-        
-        prediction_counts.append(prediction_count)
-        
-        logger.info(f"Prediction time for {test_sequence}: {prediction_time:.6f} seconds")
-        logger.info(f"Number of predictions: {prediction_count}")
-    
-    # 4. Resource utilization - agent status before and after tests
+    # 3. Resource utilization - agent status before and after tests
     status_before = temp_agent.show_status()
     temp_agent.clear_wm()  # Keep KB but clear WM
     status_after = temp_agent.show_status()
     
     # Log status information
-    logger.info(f"Agent status before: {status_before}")
-    logger.info(f"Agent status after: {status_after}")
+    logger.info("Agent status before: %s", status_before)
+    logger.info("Agent status after: %s", status_after)
     
-    # 5. Cleanup
+    # 4. Cleanup
     temp_agent.clear_all_memory()
 
 
 @pytest.mark.advanced
-def test_resource_management(temp_agent):
+@pytest.mark.slow
+@pytest.mark.parametrize("event_string", [
+    pytest.param("perf_event_0", id="first"),  # First event in training
+    pytest.param("perf_event_10", id="middle"),  # Middle event in training
+    pytest.param("perf_event_19", id="last"),  # Last event in training
+    pytest.param("unknown_event", id="unknown"),  # Not in training
+])
+def test_prediction_latency(trained_agent, node_result, event_string):
+    """Test prediction latency after observing a single event."""
+    test_event = create_gdf(strings=[event_string])
+    
+    # Time observe + get_predictions from empty working memory in nanoseconds
+    prediction_times = np.empty(PREDICTION_SAMPLES, dtype=np.int64)
+    for i in range(PREDICTION_SAMPLES):
+        trained_agent.clear_wm()
+        start_ns = time.perf_counter_ns()
+        trained_agent.observe(test_event)
+        predictions = trained_agent.get_predictions()
+        prediction_times[i] = time.perf_counter_ns() - start_ns
+    
+    prediction_count = len(node_result(predictions))
+    trained_agent.clear_wm()
+    
+    logger.info("Prediction time for %s: p50=%.3fms p90=%.3fms max=%.3fms, predictions: %d",
+                event_string, np.median(prediction_times) / 1e6,
+                np.percentile(prediction_times, 90) / 1e6, prediction_times.max() / 1e6,
+                prediction_count)
+
+
+@pytest.mark.advanced
+def test_resource_management(temp_agent, node_result):
     """Test resource management capabilities."""
     # 1. Test memory cleanup operations
     # First, populate memory with data
-    for i in range(10):
-        event = create_gdf(strings=[f"resource_event_{i}"])
+    for event in RESOURCE_EVENTS:
         temp_agent.observe(event)
     
     # Get status before cleanup
     status_before = temp_agent.show_status()
-    wm_size_before = 0
-    
-    if isinstance(status_before, dict) and 'P1' in status_before:
-        wm_size_before = status_before['P1'].get('size_WM', 0)
-    else:
-        wm_size_before = status_before.get('size_WM', 0)
+    wm_size_before = node_result(status_before).get('size_WM', 0)
     
     assert wm_size_before > 0
     
@@ -346,12 +345,7 @@ def test_resource_management(temp_agent):
     
     # Get status after cleanup
     status_after = temp_agent.show_status()
-    wm_size_after = 0
-    
-    if isinstance(status_after, dict) and 'P1' in status_after:
-        wm_size_after = status_after['P1'].get('size_WM', 0)
-    else:
-        wm_size_after = status_after.get('size_WM', 0)
+    wm_size_after = node_result(status_after).get('size_WM', 0)
     
     # Working memory should be smaller or empty after clearing
     assert wm_size_after < wm_size_before
@@ -363,9 +357,8 @@ def test_resource_management(temp_agent):
         "recall_threshold": 0.01  # Lower recall threshold for more matches
     })
     
-    # Create and observe training data
-    for i in range(5):
-        event = create_gdf(strings=[f"allocation_event_{i}"])
+    # Observe training data
+    for event in ALLOCATION_EVENTS:
         temp_agent.observe(event)
     
     # Learn to create models
@@ -384,7 +377,7 @@ def test_resource_management(temp_agent):
     
     if isinstance(predictions, dict) and 'P1' in predictions:
         prediction_count = len(predictions['P1'])
-        logger.info(f"Number of predictions with low recall threshold: {prediction_count}")
+        logger.info("Number of predictions with low recall threshold: %d", prediction_count)
         # Should have at least some predictions
         assert prediction_count > 0
     
@@ -403,8 +396,8 @@ def test_resource_management(temp_agent):
         symbols_count = len(kb_after_clear['P1'].get('symbols_kb', {}))
         models_count = len(kb_after_clear['P1'].get('models_kb', {}))
         
-        logger.info(f"Symbols after clear: {symbols_count}")
-        logger.info(f"Models after clear: {models_count}")
+        logger.info("Symbols after clear: %d", symbols_count)
+        logger.info("Models after clear: %d", models_count)
         
         # Should have few or no models/symbols
         assert symbols_count == 0
@@ -412,7 +405,7 @@ def test_resource_management(temp_agent):
 
 
 @pytest.mark.advanced
-def test_error_recovery(temp_agent):
+def test_error_recovery(temp_agent, node_result):
     """Test error recovery capabilities."""
     # 1. Test recovery from invalid data
     # First establish a valid baseline
@@ -425,7 +418,7 @@ def test_error_recovery(temp_agent):
         invalid_data = {"invalid_field": "test"}  # Missing required fields
         temp_agent.observe(invalid_data)
     except Exception as e:
-        logger.info(f"Expected error with invalid data: {str(e)}")
+        logger.info("Expected error with invalid data: %s", e)
         # System should continue functioning after error
     
     # Verify agent is still responsive after error
@@ -438,7 +431,7 @@ def test_error_recovery(temp_agent):
     try:
         temp_agent.get_model("NON_EXISTENT_MODEL_12345")
     except Exception as e:
-        logger.info(f"Expected error with non-existent model: {str(e)}")
+        logger.info("Expected error with non-existent model: %s", e)
     
     # Verify agent is still responsive
     status = temp_agent.show_status()
@@ -446,8 +439,7 @@ def test_error_recovery(temp_agent):
     
     # 3. Test recovery from extreme memory usage
     # Fill working memory with many events
-    for i in range(100):  # Large number of events
-        event = create_gdf(strings=[f"memory_intensive_event_{i}"])
+    for event in MEMORY_LOAD_EVENTS:
         temp_agent.observe(event)
     
     # Check status
@@ -459,10 +451,7 @@ def test_error_recovery(temp_agent):
     status_after_clear = temp_agent.show_status()
     
     # Working memory should be cleared
-    if isinstance(status_after_clear, dict) and 'P1' in status_after_clear:
-        wm_size = status_after_clear['P1'].get('size_WM', -1)
-    else:
-        wm_size = status_after_clear.get('size_WM', -1)
+    wm_size = node_result(status_after_clear).get('size_WM', -1)
     
     assert wm_size == 0, "Working memory should be cleared during recovery"
     
@@ -474,10 +463,7 @@ def test_error_recovery(temp_agent):
     model_result = temp_agent.learn()
     
     # Get model name
-    if isinstance(model_result, dict) and 'P1' in model_result:
-        model_name = model_result['P1']
-    else:
-        model_name = model_result
+    model_name = node_result(model_result)
     
     # Delete the model to simulate corruption
     temp_agent.delete_model(model_name)
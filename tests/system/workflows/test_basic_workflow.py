@@ -1,9 +1,6 @@
 """Basic end-to-end workflow tests for the ia-sdk package."""
-import time
 import pytest
 import logging
-import numpy as np
-from typing import Dict, List, Any
 
 from ia.gaius.utils import create_gdf
 from ia.gaius.data_ops import validate_data
@@ -35,7 +32,7 @@ def test_agent_initialization_and_connection(temp_agent):
 
 
 @pytest.mark.basic
-def test_simple_observation_and_prediction(temp_agent):
+def test_simple_observation_and_prediction(temp_agent, leaf_strings, node_result):
     """Test observing data and getting predictions."""
     # Clear working memory
     temp_agent.clear_wm()
@@ -57,17 +54,15 @@ def test_simple_observation_and_prediction(temp_agent):
     assert wm is not None
     
     # Ensure "hello" and "world" are in working memory
-    if isinstance(wm, dict) and 'P1' in wm:
-        wm_data = wm['P1']
-    else:
-        wm_data = wm
+    wm_data = node_result(wm)
     
-    assert any("hello" in str(event) for event in wm_data)
-    assert any("world" in str(event) for event in wm_data)
+    symbols = leaf_strings(wm_data)
+    assert "hello" in symbols
+    assert "world" in symbols
 
 
 @pytest.mark.basic
-def test_learning_and_model_management(temp_agent):
+def test_learning_and_model_management(temp_agent, leaf_strings, node_result):
     """Test learning and model management functionality."""
     # Clear any existing memory
     temp_agent.clear_all_memory()
@@ -87,10 +82,7 @@ def test_learning_and_model_management(temp_agent):
     assert learn_result is not None
     
     # Get the model name from the result
-    if isinstance(learn_result, dict) and 'P1' in learn_result:
-        model_name = learn_result['P1']
-    else:
-        model_name = learn_result
+    model_name = node_result(learn_result)
     
     # Retrieve the model
     model = temp_agent.get_model(model_name)
@@ -103,7 +95,7 @@ def test_learning_and_model_management(temp_agent):
         assert len(model_sequence) == 3  # Three events
         
         # Check for classification at the end
-        assert any("class1" in str(event) for event in model_sequence[-1])
+        assert "class1" in leaf_strings(model_sequence[-1])
     
     # Delete the model
     delete_result = temp_agent.delete_model(model_name)
@@ -113,11 +105,7 @@ def test_learning_and_model_management(temp_agent):
 @pytest.mark.basic
 def test_gene_modification(temp_agent):
     """Test modifying agent genes."""
-    # Get initial gene values
-    initial_rt = temp_agent.get_gene("recall_threshold")
-    assert initial_rt is not None
-    
-    # Modify recall threshold
+    # Modify recall threshold; the read-back below also covers get_gene
     new_rt_value = 0.5
     change_result = temp_agent.change_genes({"recall_threshold": new_rt_value})
     assert change_result is not None
@@ -1,14 +1,11 @@
 """Unit tests for the comcom_client module."""
 import pytest
-import sys
-import os
-from unittest.mock import Mock, patch, MagicMock
-
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../src')))
+from unittest.mock import patch
 
 from ia.gaius.experimental.comcom_client import COMCOMClient, COMCOMConnectionError, COMCOMQueryError
 
+pytestmark = pytest.mark.xdist_group(name="unit_comcom_client")
+
 class MockCOMCOMResponse:
     """Mock HTTP response."""
     def __init__(self, status_code, json_data):
@@ -23,60 +20,69 @@ class MockCOMCOMResponse:
             raise Exception(f"HTTP Error: {self.status_code}")
         return None
 
+# Responses are never modified by the client, so one instance of each is
+# shared by every request
+CONNECT_RESPONSE = MockCOMCOMResponse(200, {
+    'status': 'okay',
+    'connection': 'okay',
+    'message': 'Successfully connected'
+})
+DEFAULT_RESPONSE = MockCOMCOMResponse(200, {
+    'status': 'okay',
+    'message': 'Operation successful'
+})
+ERROR_RESPONSE = MockCOMCOMResponse(400, {
+    'status': 'failed',
+    'message': 'Operation failed'
+})
+UNAUTHORIZED_RESPONSE = MockCOMCOMResponse(401, {'status': 'error'})
+
+# Responses keyed by the last segment of the request URL
+GET_ROUTES = {'connect': CONNECT_RESPONSE, 'error': ERROR_RESPONSE}
+POST_ROUTES = {'error': ERROR_RESPONSE}
+
 class MockCOMCOMSession:
     """Mock session with proper response handling."""
-    def __init__(self):
-        self.responses = {
-            'connect': {
-                'status': 'okay',
-                'connection': 'okay',
-                'message': 'Successfully connected'
-            },
-            'default': {
-                'status': 'okay',
-                'message': 'Operation successful'
-            },
-            'error': {
-                'status': 'failed',
-                'message': 'Operation failed'
-            }
-        }
-
     def get(self, url, **kwargs):
-        if 'connect' in url:
-            return MockCOMCOMResponse(200, self.responses['connect'])
-        elif 'error' in url:
-            return MockCOMCOMResponse(400, self.responses['error'])
-        return MockCOMCOMResponse(200, self.responses['default'])
+        return GET_ROUTES.get(url.rpartition('/')[2], DEFAULT_RESPONSE)
     
     def post(self, url, **kwargs):
-        if 'error' in url:
-            return MockCOMCOMResponse(400, self.responses['error'])
-        return MockCOMCOMResponse(200, self.responses['default'])
+        return POST_ROUTES.get(url.rpartition('/')[2], DEFAULT_RESPONSE)
     
     def request(self, method, url, **kwargs):
         if method == 'GET':
             return self.get(url, **kwargs)
         elif method == 'POST':
             return self.post(url, **kwargs)
-        return MockCOMCOMResponse(200, self.responses['default'])
+        return DEFAULT_RESPONSE
 
-@pytest.fixture
-def mock_comcom_session():
-    """Create mock session."""
-    return MockCOMCOMSession()
+class MockCOMCOMErrorSession:
+    """Mock session whose requests are all rejected."""
+    def get(self, url, **kwargs):
+        return UNAUTHORIZED_RESPONSE
+
+@pytest.fixture(autouse=True, scope="module")
+def patch_requests_session():
+    """Construct every client in this module with a MockCOMCOMSession."""
+    with patch('requests.Session', new=MockCOMCOMSession):
+        yield
+
+@pytest.fixture(scope="module")
+def comcom_client_template(patch_requests_session):
+    """Create client with mocked session once per module."""
+    return COMCOMClient({
+        'api_key': 'test-key',
+        'name': 'test-comcom',
+        'domain': 'test.com',
+        'secure': False
+    })
 
 @pytest.fixture
-def mock_comcom_client(mock_comcom_session):
-    """Create client with mocked session."""
-    with patch('requests.Session', return_value=mock_comcom_session):
-        client = COMCOMClient({
-            'api_key': 'test-key',
-            'name': 'test-comcom',
-            'domain': 'test.com',
-            'secure': False
-        })
-        return client
+def mock_comcom_client(comcom_client_template):
+    """Provide the shared client, reset to its freshly constructed state."""
+    comcom_client_template._connected = False
+    comcom_client_template.send_unique_ids = True
+    return comcom_client_template
 
 @pytest.fixture
 def connected_comcom_client(mock_comcom_client):
@@ -92,12 +98,11 @@ def test_initialization():
         'domain': 'test.com',
         'secure': False
     }
-    with patch('requests.Session'):
-        client = COMCOMClient(info)
-        assert client.name == 'test-comcom'
-        assert client._domain == 'test.com'
-        assert client._api_key == 'test-key'
-        assert client._url == 'http://test-comcom.test.com/'
+    client = COMCOMClient(info)
+    assert client.name == 'test-comcom'
+    assert client._domain == 'test.com'
+    assert client._api_key == 'test-key'
+    assert client._url == 'http://test-comcom.test.com/'
 
 def test_secure_initialization():
     """Test secure client initialization."""
@@ -107,10 +112,9 @@ def test_secure_initialization():
         'domain': 'test.com',
         'secure': True
     }
-    with patch('requests.Session'):
-        client = COMCOMClient(info)
-        assert client._secure is True
-        assert client._url == 'https://test-comcom.test.com/'
+    client = COMCOMClient(info)
+    assert client._secure is True
+    assert client._url == 'https://test-comcom.test.com/'
 
 def test_connection(mock_comcom_client):
     """Test connection process."""
@@ -121,7 +125,7 @@ def test_connection(mock_comcom_client):
 
 def test_query_requires_connection(mock_comcom_client):
     """Test query fails without connection."""
-    with pytest.raises(COMCOMConnectionError):
+    with pytest.raises(COMCOMConnectionError, match="Not connected"):
         mock_comcom_client._query(mock_comcom_client.session.get, 'test')
 
 def test_query_with_connection(connected_comcom_client):
@@ -129,24 +133,21 @@ def test_query_with_connection(connected_comcom_client):
     result = connected_comcom_client._query(connected_comcom_client.session.get, 'test')
     assert result == 'Operation successful'
 
-def test_connection_error():
+def test_connection_error(monkeypatch):
     """Test error handling during connection."""
-    error_session = MagicMock()
-    error_session.get.return_value = MockCOMCOMResponse(401, {'status': 'error'})
-    
-    with patch('requests.Session', return_value=error_session):
-        client = COMCOMClient({
-            'api_key': 'test-key',
-            'name': 'test-comcom',
-            'domain': 'test.com',
-            'secure': False
-        })
-        with pytest.raises(COMCOMConnectionError):
-            client.connect()
+    monkeypatch.setattr('requests.Session', MockCOMCOMErrorSession)
+    client = COMCOMClient({
+        'api_key': 'test-key',
+        'name': 'test-comcom',
+        'domain': 'test.com',
+        'secure': False
+    })
+    with pytest.raises(COMCOMConnectionError, match="Connection failed"):
+        client.connect()
 
 def test_query_error(connected_comcom_client):
     """Test error handling during query."""
-    with pytest.raises(COMCOMQueryError):
+    with pytest.raises(COMCOMQueryError, match="HTTP Error: 400"):
         connected_comcom_client._query(connected_comcom_client.session.get, 'error')
 
 def test_ensure_connected_decorator():
@@ -159,107 +160,62 @@ def test_ensure_connected_decorator():
     })
     
     # Should raise error when not connected
-    with pytest.raises(COMCOMConnectionError):
+    with pytest.raises(COMCOMConnectionError, match="Not connected"):
         client.connect_to_agent('key', 'domain', 'name', 'type')
 
-def test_slot_operations(connected_comcom_client):
+@pytest.mark.parametrize("method,kwargs", [
+    ("connect_input_slot", {"input_name": "test_input", "input_type": "test_type"}),
+    ("disconnect_input_slot", {"input_name": "test_input"}),
+    ("connect_output_slot", {"output_name": "test_output", "output_type": "test_type"}),
+    ("disconnect_output_slot", {"output_name": "test_output"}),
+])
+def test_slot_operations(connected_comcom_client, method, kwargs):
     """Test operations on input and output slots."""
-    # Test connecting input slot
-    result = connected_comcom_client.connect_input_slot(
-        input_name="test_input",
-        input_type="test_type"
-    )
-    assert result == 'Operation successful'
-    
-    # Test disconnecting input slot
-    result = connected_comcom_client.disconnect_input_slot("test_input")
-    assert result == 'Operation successful'
-    
-    # Test connecting output slot
-    result = connected_comcom_client.connect_output_slot(
-        output_name="test_output",
-        output_type="test_type"
-    )
-    assert result == 'Operation successful'
-    
-    # Test disconnecting output slot
-    result = connected_comcom_client.disconnect_output_slot("test_output")
-    assert result == 'Operation successful'
-
-def test_agent_operations(connected_comcom_client):
+    result = getattr(connected_comcom_client, method)(**kwargs)
+    assert result == 'Operation successful'
+
+@pytest.mark.parametrize("method,kwargs", [
+    ("connect_to_agent", {
+        "api_key": "test-key",
+        "domain": "test.com",
+        "agent_name": "test-agent",
+        "agent_type": "test-type"
+    }),
+    ("disconnect_agent", {"agent_name": "test-agent"}),
+    ("call_agent_command", {"agent_name": "test-agent", "command": "test-command", "command_parameters": {}}),
+    ("clear_agents", {}),
+])
+def test_agent_operations(connected_comcom_client, method, kwargs):
     """Test operations related to agents."""
-    # Test connecting to agent
-    result = connected_comcom_client.connect_to_agent(
-        api_key="test-key",
-        domain="test.com",
-        agent_name="test-agent",
-        agent_type="test-type"
-    )
-    assert result == 'Operation successful'
-    
-    # Test disconnecting from agent
-    result = connected_comcom_client.disconnect_agent("test-agent")
-    assert result == 'Operation successful'
-    
-    # Test calling agent command
-    result = connected_comcom_client.call_agent_command(
-        agent_name="test-agent",
-        command="test-command",
-        command_parameters={}
-    )
-    assert result == 'Operation successful'
-    
-    # Test clearing agents
-    result = connected_comcom_client.clear_agents()
-    assert result == 'Operation successful'
-
-def test_pipeline_operations(connected_comcom_client):
+    result = getattr(connected_comcom_client, method)(**kwargs)
+    assert result == 'Operation successful'
+
+@pytest.mark.parametrize("method,kwargs", [
+    ("create_pipeline", {
+        "pipeline_name": "test-pipeline",
+        "pipeline_function_parameters": {},
+        "pipeline_source_fields": {},
+        "pipeline_destination_fields": {},
+        "pipeline_connections": {},
+        "pipeline_starting_functions": []
+    }),
+    ("modify_pipeline", {"pipeline_name": "test-pipeline", "modification_type": "test-mod"}),
+    ("get_pipeline_data", {"pipeline_name": "test-pipeline"}),
+    ("delete_pipeline", {"pipeline_name": "test-pipeline"}),
+])
+def test_pipeline_operations(connected_comcom_client, method, kwargs):
     """Test operations related to pipelines."""
-    # Test creating pipeline
-    result = connected_comcom_client.create_pipeline(
-        pipeline_name="test-pipeline",
-        pipeline_function_parameters={},
-        pipeline_source_fields={},
-        pipeline_destination_fields={},
-        pipeline_connections={},
-        pipeline_starting_functions=[]
-    )
-    assert result == 'Operation successful'
-    
-    # Test modifying pipeline
-    result = connected_comcom_client.modify_pipeline(
-        pipeline_name="test-pipeline",
-        modification_type="test-mod"
-    )
-    assert result == 'Operation successful'
-    
-    # Test getting pipeline data
-    result = connected_comcom_client.get_pipeline_data("test-pipeline")
-    assert result == 'Operation successful'
-    
-    # Test deleting pipeline
-    result = connected_comcom_client.delete_pipeline("test-pipeline")
+    result = getattr(connected_comcom_client, method)(**kwargs)
     assert result == 'Operation successful'
 
-def test_listing_operations(connected_comcom_client):
+@pytest.mark.parametrize("method", [
+    "list_agent_connections",
+    "list_input_slots",
+    "list_output_slots",
+    "list_pipelines",
+    "list_comcom",
+])
+def test_listing_operations(connected_comcom_client, method):
     """Test listing operations."""
-    # Test listing agents
-    result = connected_comcom_client.list_agent_connections()
-    assert result == 'Operation successful'
-    
-    # Test listing input slots
-    result = connected_comcom_client.list_input_slots()
-    assert result == 'Operation successful'
-    
-    # Test listing output slots
-    result = connected_comcom_client.list_output_slots()
-    assert result == 'Operation successful'
-    
-    # Test listing pipelines
-    result = connected_comcom_client.list_pipelines()
+    result = getattr(connected_comcom_client, method)()
     assert result == 'Operation successful'
-    
-    # Test listing COMCOM
-    result = connected_comcom_client.list_comcom()
-    assert result == 'Operation successful'
-
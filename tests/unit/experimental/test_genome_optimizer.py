@@ -1,18 +1,50 @@
 """Unit tests for the genome_optimizer module."""
 import pytest
-import sys
-import os
 import numpy as np
-from unittest.mock import Mock, patch, MagicMock
-
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../src')))
+from types import MappingProxyType
+from unittest.mock import patch
 
 from ia.gaius.experimental.genome_optimizer import (
     GenomeOptimizer, generate_gene_data, evaluate, crossover, mutate, mutate_variable
 )
 
+pytestmark = pytest.mark.xdist_group(name="unit_genome_optimizer")
+
+# Gene ranges used by every test; read-only so no test can change them for
+# the tests that follow
+GENE_CONFIG = MappingProxyType({
+    'recall_threshold': MappingProxyType({'start': 0.001, 'stop': 0.999, 'step': 0}),
+    'max_predictions': MappingProxyType({'start': 1, 'stop': 100, 'step': 1})
+})
+
+# Number of random draws checked by the sampling tests
+GENE_SAMPLES = 1000
+CROSSOVER_SAMPLES = 100
+
+# Canned evolution results returned by the eaSimple and evolve stubs; the
+# tests only read them
+FAKE_POPULATION = ({'P1': {'recall_threshold': 0.5, 'max_predictions': 50}},)
+FAKE_LOGBOOK = {'gen': 1, 'nevals': 1, 'avg': 0.8, 'min': 0.7, 'max': 0.9}
+
+def fake_evolution(*args, **kwargs):
+    """Stand-in for eaSimple and GenomeOptimizer.evolve."""
+    return list(FAKE_POPULATION), FAKE_LOGBOOK
+
 # Mock classes
+class MockAgentContext:
+    def __init__(self, bottle_info):
+        self._bottle_info = bottle_info
+
+class MockAgentContextManager:
+    def __init__(self, agent):
+        self.agent = agent
+    
+    def __enter__(self):
+        return self.agent
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
 class MockAgentManager:
     def __init__(self):
         self.current_agents = {}
@@ -32,28 +64,14 @@ class MockAgentManager:
             del self.current_agents[agent_name]
     
     def agent_context(self, genome_file, user_id, agent_id, agent_name):
-        class AgentContext:
-            def __init__(self, bottle_info):
-                self._bottle_info = bottle_info
-        
-        class ContextManager:
-            def __init__(self):
-                bottle_info = {
-                    'api_key': 'test-key',
-                    'name': agent_name,
-                    'domain': 'test.com',
-                    'secure': False
-                }
-                self.agent = AgentContext(bottle_info)
-            
-            def __enter__(self):
-                return self.agent
-            
-            def __exit__(self, exc_type, exc_val, exc_tb):
-                pass
-        
+        bottle_info = {
+            'api_key': 'test-key',
+            'name': agent_name,
+            'domain': 'test.com',
+            'secure': False
+        }
         self.current_agents[agent_name] = True
-        return ContextManager()
+        return MockAgentContextManager(MockAgentContext(bottle_info))
 
 class MockPVT:
     def __init__(self, agent=None, **kwargs):
@@ -95,24 +113,19 @@ class MockAgentClient:
         pass
 
 # Test fixtures
-@pytest.fixture
+@pytest.fixture(scope="session")
 def gene_config():
-    return {
-        'recall_threshold': {'start': 0.001, 'stop': 0.999, 'step': 0},
-        'max_predictions': {'start': 1, 'stop': 100, 'step': 1}
-    }
+    return GENE_CONFIG
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_optimizer():
+    """Optimizer shared by every test; tests change it only through monkeypatch."""
     with patch('ia.gaius.experimental.genome_optimizer.AgentManager', return_value=MockAgentManager()):
         optimizer = GenomeOptimizer(
             path_to_original_genome='test_genome.json',
             nodes_to_optimize=['P1'],
             pvt_config={'test_param': 'test_value'},
-            gene_config={
-                'recall_threshold': {'start': 0.001, 'stop': 0.999, 'step': 0},
-                'max_predictions': {'start': 1, 'stop': 100, 'step': 1}
-            },
+            gene_config=GENE_CONFIG,
             evolutionary_params={
                 'npop': 10,
                 'ngen': 5,
@@ -126,15 +139,17 @@ def mock_optimizer():
 
 def test_generate_gene_data(gene_config):
     """Test generating gene data according to config."""
-    result = generate_gene_data(gene_config)
+    results = [generate_gene_data(gene_config) for _ in range(GENE_SAMPLES)]
     
-    # Check that recall_threshold is within range and is a float
-    assert 0.001 <= result['recall_threshold'] <= 0.999
-    assert isinstance(result['recall_threshold'], float)
+    # Check that recall_threshold is a float and every sample is within range
+    assert isinstance(results[0]['recall_threshold'], float)
+    rt_values = np.fromiter((r['recall_threshold'] for r in results), dtype=np.float64, count=GENE_SAMPLES)
+    assert rt_values.min() >= 0.001 and rt_values.max() <= 0.999
     
-    # Check that max_predictions is within range and is an integer
-    assert 1 <= result['max_predictions'] <= 100
-    assert isinstance(result['max_predictions'], int)
+    # Check that max_predictions is an integer and every sample is within range
+    assert isinstance(results[0]['max_predictions'], int)
+    mp_values = np.fromiter((r['max_predictions'] for r in results), dtype=np.int64, count=GENE_SAMPLES)
+    assert mp_values.min() >= 1 and mp_values.max() <= 100
 
 def test_mutate_variable(gene_config):
     """Test mutation of individual variables."""
@@ -191,33 +206,41 @@ def test_individual_mutation(mock_optimizer, monkeypatch):
     assert result['P1']['recall_threshold'] == 0.6
     assert result['P1']['max_predictions'] == 60
 
-def test_crossover_operation(mock_optimizer):
+def test_crossover_operation(mock_optimizer, monkeypatch):
     """Test crossover between two individuals."""
-    # Create parent individuals
-    parent1 = {'P1': {'recall_threshold': 0.2, 'max_predictions': 20}}
-    parent2 = {'P1': {'recall_threshold': 0.8, 'max_predictions': 80}}
+    gene_config = mock_optimizer.gene_config
+    
+    # Create parent individuals: one fixed pair, then random pairs
+    parents = [({'P1': {'recall_threshold': 0.2, 'max_predictions': 20}},
+                {'P1': {'recall_threshold': 0.8, 'max_predictions': 80}})]
+    parents += [({'P1': generate_gene_data(gene_config)}, {'P1': generate_gene_data(gene_config)})
+                for _ in range(CROSSOVER_SAMPLES - 1)]
     
     # Create toolbox mock that returns the original individual
-    mock_optimizer.toolbox.clone = lambda x: dict(x)
+    monkeypatch.setattr(mock_optimizer.toolbox, 'clone', lambda x: dict(x))
     
     # Test crossover
-    child1, child2 = crossover(
+    children = [crossover(
         individual1=parent1,
         individual2=parent2,
         toolbox=mock_optimizer.toolbox,
-        gene_config=mock_optimizer.gene_config
-    )
+        gene_config=gene_config
+    ) for parent1, parent2 in parents]
+    
+    def gene_values(index, key, dtype):
+        return np.fromiter((pair[index]['P1'][key] for pair in children), dtype=dtype, count=CROSSOVER_SAMPLES)
+    
+    rt1, rt2 = gene_values(0, 'recall_threshold', np.float64), gene_values(1, 'recall_threshold', np.float64)
+    mp1, mp2 = gene_values(0, 'max_predictions', np.int64), gene_values(1, 'max_predictions', np.int64)
     
     # Check that children have values between parents (based on quartiles)
     # Since our crossover uses 25% and 75% quartiles
-    assert child1['P1']['recall_threshold'] <= child2['P1']['recall_threshold']
-    assert child1['P1']['max_predictions'] <= child2['P1']['max_predictions']
+    assert np.all(rt1 <= rt2)
+    assert np.all(mp1 <= mp2)
     
     # Check that children are within bounds
-    assert 0.001 <= child1['P1']['recall_threshold'] <= 0.999
-    assert 0.001 <= child2['P1']['recall_threshold'] <= 0.999
-    assert 1 <= child1['P1']['max_predictions'] <= 100
-    assert 1 <= child2['P1']['max_predictions'] <= 100
+    assert np.all((rt1 >= 0.001) & (rt1 <= 0.999) & (rt2 >= 0.001) & (rt2 <= 0.999))
+    assert np.all((mp1 >= 1) & (mp1 <= 100) & (mp2 >= 1) & (mp2 <= 100))
 
 def test_evaluate_function(gene_config):
     """Test the evaluate function."""
@@ -261,16 +284,7 @@ def test_generate_individual(mock_optimizer):
 def test_evolve_process(mock_optimizer, monkeypatch):
     """Test the evolution process."""
     # Mock the algorithms.eaSimple function to avoid actual evolution
-    def mock_ea_simple(*args, **kwargs):
-        # Return a mock population and logbook
-        population = [
-            {'P1': {'recall_threshold': 0.5, 'max_predictions': 50}}
-        ]
-        logbook = {'gen': 1, 'nevals': 1, 'avg': 0.8, 'min': 0.7, 'max': 0.9}
-        return population, logbook
-    
-    # Apply the mock
-    monkeypatch.setattr('ia.gaius.experimental.genome_optimizer.algorithms.eaSimple', mock_ea_simple)
+    monkeypatch.setattr('ia.gaius.experimental.genome_optimizer.algorithms.eaSimple', fake_evolution)
     
     # Run evolution
     result = mock_optimizer.evolve()
@@ -284,17 +298,10 @@ def test_evolve_process(mock_optimizer, monkeypatch):
 
 def test_multiprocessed_evolve(mock_optimizer, monkeypatch):
     """Test multiprocessed evolution."""
-    # Mock the evolve method to avoid actual evolution
-    def mock_evolve(pool=None):
-        # Return a mock population and logbook
-        population = [
-            {'P1': {'recall_threshold': 0.5, 'max_predictions': 50}}
-        ]
-        logbook = {'gen': 1, 'nevals': 1, 'avg': 0.8, 'min': 0.7, 'max': 0.9}
-        return population, logbook
-    
-    # Apply the mock
-    monkeypatch.setattr(mock_optimizer, 'evolve', mock_evolve)
+    # Mock the evolve method to avoid actual evolution; the shared manager
+    # may already have started the hoster
+    monkeypatch.setattr(mock_optimizer, 'evolve', fake_evolution)
+    monkeypatch.setattr(mock_optimizer.am, 'hoster_started', False)
     
     # Run multiprocessed evolution with limited cores
     result = mock_optimizer.multiprocessed_evolve(n_proc=1)
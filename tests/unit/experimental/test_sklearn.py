@@ -1,20 +1,18 @@
 """Unit tests for the sklearn integration module."""
+import math
 import pytest
-import sys
-import os
 import numpy as np
-import pandas as pd
-from unittest.mock import Mock, patch, MagicMock
-
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../src')))
+from collections import Counter
+from unittest.mock import patch
 
 from ia.gaius.experimental.sklearn import (
     GAIuSClassifier, GDFTransformer, GAIuSTransformer, 
-    ensemble2vec, make_sklearn_fv, get_feature_names_from_weights
+    ensemble2vec, make_sklearn_fv, get_feature_names_from_weights, max_magnitude
 )
 from ia.gaius.data_structures import PredictionEnsemble
 
+pytestmark = pytest.mark.xdist_group(name="unit_sklearn")
+
 # Mock classes
 class MockAgentManager:
     def __init__(self):
@@ -46,6 +44,59 @@ class MockPrediction:
     def __init__(self, prediction_data):
         self._prediction = prediction_data
 
+# Every field read by ia.gaius.data_structures.Prediction, with empty values
+PREDICTION_TEMPLATE = {
+    'confidence': 0.0,
+    'confluence': 0.0,
+    'emotives': {},
+    'entropy': 0.0,
+    'evidence': 0.0,
+    'extras': [],
+    'fragmentation': 0.0,
+    'frequency': 1,
+    'future': [],
+    'grand_hamiltonian': 0.0,
+    'hamiltonian': 0.0,
+    'itfdf_similarity': 0.0,
+    'matches': [],
+    'missing': [],
+    'name': '',
+    'past': [],
+    'potential': 0.0,
+    'present': [],
+    'similarity': 0.0,
+    'snr': 0.0,
+    'type': 'prototypical'
+}
+
+# Constant responses returned by MockAgentClient
+MOCK_PREDICTIONS = (
+    MockPrediction({
+        'matches': ['class1', 'feature1'],
+        'missing': ['feature2'],
+        'name': 'MODEL|model1'
+    }),
+    MockPrediction({
+        'matches': ['class2'],
+        'missing': [],
+        'name': 'MODEL|model2'
+    })
+)
+MOCK_KBS = {
+    'P1': {
+        'symbols_kb': {
+            'class1': {},
+            'class2': {},
+            'feature1': {},
+            'feature2': {}
+        },
+        'models_kb': {
+            'model1': {},
+            'model2': {}
+        }
+    }
+}
+
 class MockAgentClient:
     def __init__(self, bottle_info):
         self._bottle_info = bottle_info
@@ -89,39 +140,13 @@ class MockAgentClient:
     
     def get_predictions(self):
         # Return a mock prediction ensemble
-        return {
-            'P1': [
-                MockPrediction({
-                    'matches': ['class1', 'feature1'],
-                    'missing': ['feature2'],
-                    'name': 'MODEL|model1'
-                }),
-                MockPrediction({
-                    'matches': ['class2'],
-                    'missing': [],
-                    'name': 'MODEL|model2'
-                })
-            ]
-        }
+        return {'P1': list(MOCK_PREDICTIONS)}
     
     def learn(self):
         return {'P1': 'MODEL|test_model'}
     
     def get_kbs_as_json(self, ids=False, obj=True):
-        return {
-            'P1': {
-                'symbols_kb': {
-                    'class1': {},
-                    'class2': {},
-                    'feature1': {},
-                    'feature2': {}
-                },
-                'models_kb': {
-                    'model1': {},
-                    'model2': {}
-                }
-            }
-        }
+        return MOCK_KBS
     
     def remove_symbols_from_system(self, symbols_list):
         return 'removed'
@@ -132,14 +157,50 @@ class MockAgentClient:
     def load_kbs_from_json(self, obj):
         return 'loaded'
 
+# Attributes set by GAIuSClassifier.fit, as they are before the first fit
+UNFITTED_STATE = {
+    'classes_': None,
+    'X_': None,
+    'y_': None,
+    'cv_predictions': None,
+    'cv_actuals': None,
+    'cv_sequences': None,
+    'dreamer_results': None
+}
+
+SAMPLE_SEQUENCES = (
+    [{'strings': ['feature1', 'feature2'], 'vectors': [], 'emotives': {}}],
+    [{'strings': ['feature1', 'feature3'], 'vectors': [], 'emotives': {}}],
+    [{'strings': ['feature2', 'feature3'], 'vectors': [], 'emotives': {}}]
+)
+SAMPLE_LABELS = ('class1', 'class2', 'class1')
+
+# GDF returned by the patched create_gdf in the GDFTransformer tests
+TEST_GDF = {'strings': ['test'], 'vectors': [], 'emotives': {}}
+
+def _gdf_rows(count):
+    """Expected GDFTransformer output: one single-GDF sequence per row."""
+    return np.fromiter(([TEST_GDF] for _ in range(count)), dtype=object, count=count).reshape(-1, 1)
+
 # Test fixtures
-@pytest.fixture
+@pytest.fixture(autouse=True, scope="module")
+def patch_validate_data():
+    """Accept every GDF in this module without validating it."""
+    with patch('ia.gaius.experimental.sklearn.validate_data', return_value=True):
+        yield
+
+@pytest.fixture(scope="module")
 def mock_agent_manager():
     return MockAgentManager()
 
-@pytest.fixture
-def mock_gaius_classifier():
-    with patch('ia.gaius.experimental.sklearn.AgentManager', return_value=MockAgentManager()):
+@pytest.fixture(scope="module")
+def gaius_classifier_template(mock_agent_manager):
+    """Create classifier with mocked agent manager once per module.
+    
+    AgentManager is only used while the classifier is constructed, so the
+    patch does not need to outlive construction.
+    """
+    with patch('ia.gaius.experimental.sklearn.AgentManager', return_value=mock_agent_manager):
         classifier = GAIuSClassifier(
             recall_threshold=0.1,
             max_predictions=5,
@@ -149,17 +210,20 @@ def mock_gaius_classifier():
             shuffle=True,
             pred_as_int=True
         )
-        return classifier
+    return classifier
 
 @pytest.fixture
+def mock_gaius_classifier(gaius_classifier_template):
+    """Provide the shared classifier, reset to its unfitted state."""
+    gaius_classifier_template.__dict__.update(UNFITTED_STATE)
+    gaius_classifier_template.__dict__.pop('str_classes_', None)
+    return gaius_classifier_template
+
+@pytest.fixture(scope="module")
 def sample_data():
-    # Create a small dataset for testing
-    X = np.zeros((3, 1), dtype=object)
-    X[0][0] = [{'strings': ['feature1', 'feature2'], 'vectors': [], 'emotives': {}}]
-    X[1][0] = [{'strings': ['feature1', 'feature3'], 'vectors': [], 'emotives': {}}]
-    X[2][0] = [{'strings': ['feature2', 'feature3'], 'vectors': [], 'emotives': {}}]
-    
-    y = np.array(['class1', 'class2', 'class1'])
+    # Create a small dataset for testing; each row holds a single GDF sequence
+    X = np.fromiter(SAMPLE_SEQUENCES, dtype=object, count=len(SAMPLE_SEQUENCES)).reshape(-1, 1)
+    y = np.array(SAMPLE_LABELS)
     
     return X, y
 
@@ -183,71 +247,62 @@ def test_gaius_classifier_fit(mock_gaius_classifier, sample_data):
     """Test GAIuSClassifier fit method."""
     X, y = sample_data
     
-    # Mock the validation data method to avoid validation errors
-    with patch('ia.gaius.experimental.sklearn.validate_data', return_value=True):
-        # Fit the classifier
-        classifier = mock_gaius_classifier.fit(X, y)
-        
-        # Check that the classifier was fitted
-        assert classifier.classes_ is not None
-        assert len(classifier.classes_) == 2
-        assert classifier.X_ is not None
-        assert classifier.y_ is not None
-        assert len(classifier.X_) == len(X)
-        assert len(classifier.y_) == len(y)
-        
-        # Verify that the string classes are stored
-        assert 'class1' in classifier.str_classes_
-        assert 'class2' in classifier.str_classes_
+    # Fit the classifier
+    classifier = mock_gaius_classifier.fit(X, y)
+    
+    # Check that the classifier was fitted
+    assert classifier.classes_ is not None
+    assert len(classifier.classes_) == 2
+    assert classifier.X_ is not None
+    assert classifier.y_ is not None
+    assert len(classifier.X_) == len(X)
+    assert len(classifier.y_) == len(y)
+    
+    # Verify that the string classes are stored
+    assert 'class1' in classifier.str_classes_
+    assert 'class2' in classifier.str_classes_
 
 def test_gaius_classifier_predict(mock_gaius_classifier, sample_data):
     """Test GAIuSClassifier predict method."""
     X, y = sample_data
     
     # First fit the classifier
-    with patch('ia.gaius.experimental.sklearn.validate_data', return_value=True):
-        mock_gaius_classifier.fit(X, y)
+    mock_gaius_classifier.fit(X, y)
+    
+    # Mock prediction ensemble utility function
+    with patch('ia.gaius.experimental.sklearn.prediction_ensemble_model_classification') as mock_pred:
+        # Configure mock to return class1 as most common
+        mock_pred.return_value = Counter({'class1': 1})
         
-        # Mock prediction ensemble utility function
-        with patch('ia.gaius.experimental.sklearn.prediction_ensemble_model_classification') as mock_pred:
-            # Configure mock to return class1 as most common
-            mock_counter = MagicMock()
-            mock_counter.most_common.return_value = [('class1', 1)]
-            mock_pred.return_value = mock_counter
-            
-            # Test prediction
-            predictions = mock_gaius_classifier.predict(X)
-            
-            # Verify predictions
-            assert len(predictions) == len(X)
-            # Since pred_as_int is True and class1 is converted to index 0
-            assert predictions[0] == 0
+        # Test prediction
+        predictions = mock_gaius_classifier.predict(X)
+        
+        # Verify predictions
+        assert len(predictions) == len(X)
+        # Since pred_as_int is True and class1 is converted to index 0
+        assert predictions[0] == 0
 
 def test_gaius_classifier_predict_proba(mock_gaius_classifier, sample_data):
     """Test GAIuSClassifier predict_proba method."""
     X, y = sample_data
     
     # First fit the classifier
-    with patch('ia.gaius.experimental.sklearn.validate_data', return_value=True):
-        mock_gaius_classifier.fit(X, y)
+    mock_gaius_classifier.fit(X, y)
+    
+    # Mock prediction ensemble utility function
+    with patch('ia.gaius.experimental.sklearn.prediction_ensemble_model_classification') as mock_pred:
+        # Configure mock to return probabilities; predict_proba normalizes
+        # the counter in place, so each sample gets its own
+        mock_pred.side_effect = lambda ensemble: Counter({'class1': 0.7, 'class2': 0.3})
         
-        # Mock prediction ensemble utility function
-        with patch('ia.gaius.experimental.sklearn.prediction_ensemble_model_classification') as mock_pred:
-            # Configure mock to return probabilities
-            mock_counter = MagicMock()
-            mock_counter.get.side_effect = lambda x, default: 0.7 if x == 'class1' else 0.3
-            mock_counter.__iter__.return_value = ['class1', 'class2']
-            mock_counter.values.return_value = [0.7, 0.3]
-            mock_pred.return_value = mock_counter
-            
-            # Test prediction probabilities
-            probas = mock_gaius_classifier.predict_proba(X)
-            
-            # Verify probabilities
-            assert len(probas) == len(X)
-            assert probas.shape[1] == 2  # Two classes
-            # The actual values are transformed with softmax, so we just check they sum to 1
-            assert np.isclose(np.sum(probas[0]), 1.0)
+        # Test prediction probabilities
+        probas = mock_gaius_classifier.predict_proba(X)
+        
+        # Verify probabilities
+        assert len(probas) == len(X)
+        assert probas.shape[1] == 2  # Two classes
+        # The actual values are transformed with softmax, so we just check they sum to 1
+        assert math.isclose(math.fsum(probas[0].tolist()), 1.0)
 
 def test_gdf_transformer_initialization():
     """Test GDFTransformer initialization."""
@@ -276,18 +331,17 @@ def test_gdf_transformer_transform():
     
     # Transform without feature names
     with patch('ia.gaius.experimental.sklearn.create_gdf') as mock_gdf:
-        mock_gdf.return_value = {'strings': ['test'], 'vectors': [], 'emotives': {}}
+        mock_gdf.return_value = TEST_GDF
         
         result = transformer.transform(X)
         
-        # Verify result shape
-        assert result.shape == (2, 1)
+        # Verify every row holds a single-GDF sequence
         assert isinstance(result, np.ndarray)
+        np.testing.assert_array_equal(result, _gdf_rows(len(X)))
         
-        # Verify create_gdf was called correctly
-        calls = mock_gdf.call_args_list
-        assert len(calls) == 2
-        assert 'strings' in calls[0][1]
+        # Verify create_gdf was called with column indices as feature names
+        kwargs_list = [c.kwargs for c in mock_gdf.call_args_list]
+        assert kwargs_list == [{'strings': ['0|1', '1|2']}, {'strings': ['0|3', '1|4']}]
 
 def test_gdf_transformer_with_feature_names():
     """Test GDFTransformer transform with feature names."""
@@ -298,16 +352,17 @@ def test_gdf_transformer_with_feature_names():
     
     # Transform with feature names
     with patch('ia.gaius.experimental.sklearn.create_gdf') as mock_gdf:
-        mock_gdf.return_value = {'strings': ['test'], 'vectors': [], 'emotives': {}}
+        mock_gdf.return_value = TEST_GDF
         
         result = transformer.transform(X, feature_names=['feature1', 'feature2'])
+        np.testing.assert_array_equal(result, _gdf_rows(len(X)))
         
         # Verify create_gdf was called with feature names
-        calls = mock_gdf.call_args_list
-        assert len(calls) == 2
-        assert 'strings' in calls[0][1]
-        assert 'feature1|1' in str(calls[0][1]['strings'])
-        assert 'feature2|2' in str(calls[0][1]['strings'])
+        kwargs_list = [c.kwargs for c in mock_gdf.call_args_list]
+        assert kwargs_list == [
+            {'strings': ['feature1|1', 'feature2|2']},
+            {'strings': ['feature1|3', 'feature2|4']}
+        ]
 
 def test_gaius_transformer_transform(mock_gaius_classifier, sample_data):
     """Test GAIuSTransformer transform method."""
@@ -324,48 +379,50 @@ def test_gaius_transformer_transform(mock_gaius_classifier, sample_data):
     with patch.object(transformer, '_predict_on_sequence') as mock_predict:
         mock_predict.return_value = {'P1': [MockPrediction({'matches': ['class1'], 'missing': [], 'name': 'MODEL|test'})]}
         
-        with patch('ia.gaius.experimental.sklearn.validate_data', return_value=True):
-            with patch('ia.gaius.experimental.sklearn.make_sklearn_fv_no_y') as mock_make_fv:
-                mock_make_fv.return_value = np.zeros((len(X), 10))
-                
-                # First fit, then transform
-                transformer.fit(X, y)
-                result = transformer.transform(X)
-                
-                # Verify result
-                assert result.shape == (len(X), 10)
-                assert mock_make_fv.called
-                
-                # Verify predict_on_sequence was called for each sample
-                assert mock_predict.call_count == len(X)
+        with patch('ia.gaius.experimental.sklearn.make_sklearn_fv_no_y') as mock_make_fv:
+            mock_make_fv.return_value = np.zeros((len(X), 10))
+            
+            # First fit, then transform
+            transformer.fit(X, y)
+            result = transformer.transform(X)
+            
+            # Verify result
+            assert result.shape == (len(X), 10)
+            assert mock_make_fv.called
+            
+            # Verify predict_on_sequence was called for each sample
+            assert mock_predict.call_count == len(X)
 
-def test_ensemble2vec():
-    """Test ensemble2vec utility function."""
-    # Create mock prediction ensemble
+@pytest.fixture(scope="module")
+def symbol_ensemble():
+    """Create a single-prediction ensemble and the symbol names to vectorize it against."""
     prediction = PredictionEnsemble({
         'P1': [
-            MockPrediction({
-                'matches': ['symbol1', 'symbol2'],
-                'missing': [],
-                'name': 'MODEL|model1'
-            })
+            dict(PREDICTION_TEMPLATE, matches=['symbol1', 'symbol2'], name='model1')
         ]
     })
     
     # Define sorted symbol names to use
     sorted_symbols = ['symbol1', 'symbol2', 'symbol3', 'MODEL|model1']
     
+    return prediction, sorted_symbols
+
+@pytest.mark.parametrize("max_predictions", [1, 3])
+def test_ensemble2vec(symbol_ensemble, max_predictions):
+    """Test ensemble2vec utility function."""
+    prediction, sorted_symbols = symbol_ensemble
+    
     # Call ensemble2vec
     with patch('ia.gaius.experimental.sklearn.flatten', return_value=['symbol1', 'symbol2']):
         result = ensemble2vec(
             ensemble=prediction,
             sorted_symbol_names=sorted_symbols,
-            max_predictions=1,
+            max_predictions=max_predictions,
             prediction_fields=['matches', 'missing', 'name']
         )
         
         # Verify result shape
-        assert len(result) == len(sorted_symbols) * 3  # 3 prediction fields
+        assert len(result) == len(sorted_symbols) * 3 * max_predictions  # 3 prediction fields
         
         # Check that the right indices are set to True
         symbol1_index = 0  # First symbol in matches field
@@ -376,6 +433,9 @@ def test_ensemble2vec():
         
         model_index = len(sorted_symbols) * 2 + 3  # Model name in the name field (third field)
         assert result[model_index] == 1
+        
+        # Nothing else is set; slots past the first prediction stay empty
+        assert result.sum() == 3
 
 def test_make_sklearn_fv():
     """Test make_sklearn_fv utility function."""
@@ -444,16 +504,12 @@ def test_get_feature_names_from_weights():
             assert 'symbols' in result[0]
 
 # Test helper functions
-def test_max_magnitude():
+@pytest.mark.parametrize("a,b,want", [
+    (5, 3, 5),  # positive numbers
+    (-5, -3, -5),  # negative numbers
+    (-5, 3, -5),  # mixed numbers
+    (5, -7, -7)
+])
+def test_max_magnitude(a, b, want):
     """Test max_magnitude utility function."""
-    from ia.gaius.experimental.sklearn import max_magnitude
-    
-    # Test with positive numbers
-    assert max_magnitude(5, 3) == 5
-    
-    # Test with negative numbers
-    assert max_magnitude(-5, -3) == -5
-    
-    # Test with mixed numbers
-    assert max_magnitude(-5, 3) == -5
-    assert max_magnitude(5, -7) == -7
+    assert max_magnitude(a, b) == want
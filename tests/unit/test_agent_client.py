@@ -1,14 +1,12 @@
 """Unit tests for the agent_client module."""
 import pytest
-import sys
-import os
-from unittest.mock import Mock, patch, MagicMock
-
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from ia.gaius.agent_client import AgentClient, AgentQueryError, AgentConnectionError
 
+pytestmark = pytest.mark.xdist_group(name="unit_agent_client")
+
 MOCK_GENOME_DATA = {
     'agent': 'test_agent',
     'description': 'Test agent genome',
@@ -71,6 +69,8 @@ MOCK_GENOME_DATA = {
 
 class MockGenome:
     """Mock Genome class for testing."""
+    __slots__ = ('primitive_map', 'manipulative_map', 'primitives')
+
     def __init__(self):
         self.primitive_map = MOCK_GENOME_DATA['primitive_map']
         self.manipulative_map = MOCK_GENOME_DATA['manipulative_map']
@@ -79,8 +79,13 @@ class MockGenome:
             'pid1': {'name': 'P1', 'id': 'pid1'}
         }
 
+# The genome is only read, so every connection shares one instance
+MOCK_GENOME = MockGenome()
+
 class MockResponse:
     """Mock HTTP response."""
+    __slots__ = ('status_code', '_json_data')
+
     def __init__(self, status_code, json_data):
         self.status_code = status_code
         self._json_data = json_data
@@ -88,42 +93,56 @@ class MockResponse:
     def json(self):
         return self._json_data
 
+# Responses are never modified by the client, so one instance of each is
+# shared by every request
+CONNECT_RESPONSE = MockResponse(200, {
+    'status': 'okay',
+    'connection': 'okay',
+    'genie': 'test_genie',
+    'agent_name': 'test_agent',
+    'genome': MOCK_GENOME_DATA
+})
+GENOME_RESPONSE = MockResponse(200, {
+    'status': 'okay',
+    'connection': 'okay',
+    'genie': 'test_genie',
+    'genome': MOCK_GENOME_DATA
+})
+DEFAULT_RESPONSE = MockResponse(200, {
+    'status': 'okay',
+    'connection': 'okay',
+    'genie': 'test_genie',
+    'data': 'test_data'
+})
+UNAUTHORIZED_RESPONSE = MockResponse(401, {'status': 'error'})
+
+# Responses keyed by the last path segment of the request URL
+GET_ROUTES = {'connect': CONNECT_RESPONSE, 'genome': GENOME_RESPONSE}
+
 class MockSession:
     """Mock session with proper response handling."""
-    def __init__(self):
-        self.responses = {
-            'connect': {
-                'status': 'okay',
-                'connection': 'okay',
-                'genie': 'test_genie',
-                'agent_name': 'test_agent',
-                'genome': MOCK_GENOME_DATA
-            },
-            'genome': {
-                'status': 'okay',
-                'connection': 'okay',
-                'genie': 'test_genie',
-                'genome': MOCK_GENOME_DATA
-            },
-            'default': {
-                'status': 'okay',
-                'connection': 'okay',
-                'genie': 'test_genie',
-                'data': 'test_data'
-            }
-        }
-
     def get(self, url, **kwargs):
-        if 'connect' in url:
-            return MockResponse(200, self.responses['connect'])
-        elif 'genome' in url:
-            return MockResponse(200, self.responses['genome'])
-        return MockResponse(200, self.responses['default'])
+        key = url.rsplit('/', 1)[-1].split('?', 1)[0]
+        return GET_ROUTES.get(key, DEFAULT_RESPONSE)
     
     def request(self, method, url, **kwargs):
         if method == 'GET':
             return self.get(url, **kwargs)
-        return MockResponse(200, self.responses['default'])
+        return DEFAULT_RESPONSE
+
+class ErrorSession:
+    """Mock session whose requests are all rejected."""
+    def get(self, url, **kwargs):
+        return UNAUTHORIZED_RESPONSE
+
+    def request(self, method, url, **kwargs):
+        return self.get(url, **kwargs)
+
+@pytest.fixture(autouse=True, scope="module")
+def patch_genome():
+    """Build every genome in this module from the mock genome data."""
+    with patch('ia.gaius.genome_info.Genome', return_value=MOCK_GENOME):
+        yield
 
 @pytest.fixture
 def mock_session():
@@ -145,9 +164,8 @@ def mock_agent_client(mock_session):
 @pytest.fixture
 def connected_client(mock_agent_client):
     """Create pre-connected client."""
-    with patch('ia.gaius.genome_info.Genome', return_value=MockGenome()):
-        mock_agent_client.connect()
-        return mock_agent_client
+    mock_agent_client.connect()
+    return mock_agent_client
 
 def test_initialization():
     """Test client initialization."""
@@ -165,13 +183,12 @@ def test_initialization():
 
 def test_connection(mock_agent_client):
     """Test connection process."""
-    with patch('ia.gaius.genome_info.Genome', return_value=MockGenome()):
-        # Test connection
-        result = mock_agent_client.connect()
-        assert mock_agent_client._connected is True
-        assert mock_agent_client.genome is not None
-        assert result['connection'] == 'okay'
-        assert result['agent'] == 'test_genie'
+    # Test connection
+    result = mock_agent_client.connect()
+    assert mock_agent_client._connected is True
+    assert mock_agent_client.genome is not None
+    assert result['connection'] == 'okay'
+    assert result['agent'] == 'test_genie'
     
 def test_query_requires_connection(mock_agent_client):
     """Test query fails without connection."""
@@ -185,10 +202,7 @@ def test_query_with_connection(connected_client):
 
 def test_error_handling():
     """Test error handling during connection."""
-    error_session = MagicMock()
-    error_session.get.return_value = MockResponse(401, {'status': 'error'})
-    
-    with patch('requests.Session', return_value=error_session):
+    with patch('requests.Session', return_value=ErrorSession()):
         client = AgentClient({
             'api_key': 'test-key',
             'name': 'test-agent',
@@ -267,9 +281,8 @@ def test_query_timeout_handling(mock_session):
         
         # Since we're mocking, we can't really test the timeout behavior directly,
         # but we can verify the method works
-        with patch('ia.gaius.genome_info.Genome', return_value=MockGenome()):
-            client.connect()
-            assert client._connected is True
+        client.connect()
+        assert client._connected is True
 
 def test_query_with_invalid_nodes(connected_client):
     """Test query with invalid node configurations."""
@@ -278,59 +291,49 @@ def test_query_with_invalid_nodes(connected_client):
         connected_client._query(connected_client.session.get, 'status', nodes=[])
     
     # Test with non-existing node
-    mock_response = MagicMock()
-    mock_response.json.return_value = {'status': 'failed', 'message': 'Node not found'}
+    mock_response = SimpleNamespace(
+        status_code=200,
+        raise_for_status=lambda: None,
+        json=lambda: {'status': 'failed', 'message': 'Node not found'}
+    )
     
     with patch.object(connected_client.session, 'get', return_value=mock_response):
         with pytest.raises(AgentQueryError):
             connected_client._query(connected_client.session.get, 'status', nodes=['NonExistentNode'])
 
-def test_query_response_processing(connected_client):
-    """Test query response processing."""
-    # Test response processing with send_unique_ids=True
-    connected_client.send_unique_ids = True
-    unique_id = 'test-unique-id'
-    
-    # Mock response with unique_id
-    mock_response = MagicMock()
-    mock_response.json.return_value = {
-        'status': 'okay', 
-        'message': {'data': 'test_data', 'unique_id': unique_id}
-    }
-    
-    with patch.object(connected_client.session, 'get', return_value=mock_response):
-        result, returned_id = connected_client._query(
-            connected_client.session.get, 'test', nodes=['P1'], unique_id=unique_id
-        )
-        assert 'unique_id' in result
-        assert result['unique_id'] == unique_id
-        assert returned_id == unique_id
-    
-    # Test response processing with send_unique_ids=False
-    connected_client.send_unique_ids = False
-    
-    with patch.object(connected_client.session, 'get', return_value=mock_response):
-        result, returned_id = connected_client._query(
-            connected_client.session.get, 'test', nodes=['P1'], unique_id=unique_id
-        )
-        # unique_id should be removed from the response
-        assert 'unique_id' not in result
-        assert returned_id == unique_id
-    
-    # Test summarize_for_single_node behavior
-    connected_client.send_unique_ids = True
-    connected_client.summarize_for_single_node = True
-    
-    with patch.object(connected_client.session, 'get', return_value=mock_response):
-        result = connected_client._query(connected_client.session.get, 'test', nodes=['P1'])
-        # Result should be directly from the message, not wrapped in a dict
-        assert result == {'data': 'test_data', 'unique_id': unique_id}
+UNIQUE_ID = 'test-unique-id'
+UNIQUE_ID_MESSAGE = {'data': 'test_data', 'unique_id': UNIQUE_ID}
+
+@pytest.fixture(scope="module")
+def unique_id_response():
+    """Create a response whose message carries a unique_id.
     
-    # Test multiple nodes (should not summarize)
+    Each json() call returns a fresh message, since _query strips unique_id
+    from it in place when send_unique_ids is False.
+    """
+    return SimpleNamespace(
+        status_code=200,
+        raise_for_status=lambda: None,
+        json=lambda: {'status': 'okay', 'message': dict(UNIQUE_ID_MESSAGE)}
+    )
+
+@pytest.mark.parametrize("send_unique_ids,nodes,unique_id,expected", [
+    pytest.param(True, ['P1'], UNIQUE_ID, (UNIQUE_ID_MESSAGE, UNIQUE_ID), id="send_unique_ids"),
+    # unique_id should be removed from the response
+    pytest.param(False, ['P1'], UNIQUE_ID, ({'data': 'test_data'}, UNIQUE_ID), id="strip_unique_ids"),
+    # Result should be directly from the message, not wrapped in a dict
+    pytest.param(True, ['P1'], None, UNIQUE_ID_MESSAGE, id="summarize_single_node"),
+    # Multiple nodes should not summarize; node names are the keys
+    pytest.param(True, ['P1', 'P1'], None, {'P1': UNIQUE_ID_MESSAGE}, id="multiple_nodes"),
+])
+def test_query_response_processing(connected_client, unique_id_response, send_unique_ids, nodes, unique_id,
+                                   expected):
+    """Test query response processing."""
+    connected_client.send_unique_ids = send_unique_ids
     connected_client.summarize_for_single_node = True
     
-    with patch.object(connected_client.session, 'get', return_value=mock_response):
-        result = connected_client._query(connected_client.session.get, 'test', nodes=['P1', 'P1'])
-        # Result should be a dict with node names as keys
-        assert 'P1' in result
-        assert result['P1'] == {'data': 'test_data', 'unique_id': unique_id}
+    with patch.object(connected_client.session, 'get', return_value=unique_id_response):
+        result = connected_client._query(
+            connected_client.session.get, 'test', nodes=nodes, unique_id=unique_id
+        )
+    assert result == expected